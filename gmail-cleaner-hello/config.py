@@ -6,15 +6,303 @@ filter settings, storage locations, and safety parameters.
 """
 
 import os
-import yaml
+import sys
 import json
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
-from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional, Callable
+from dataclasses import dataclass, field, fields
 from datetime import datetime, timedelta
 
+# orjson is optional; the standard library json module is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-@dataclass
+# PyYAML is imported on first use so JSON-only setups never load it
+_yaml = None
+
+
+def _import_yaml() -> tuple:
+    """
+    Import PyYAML along with its fastest available safe loader and dumper.
+    
+    Returns:
+        Tuple of (yaml module, loader class, dumper class)
+    """
+    global _yaml
+    if _yaml is None:
+        import yaml
+        # Prefer the libyaml-backed C loader/dumper, falling back to pure Python
+        try:
+            from yaml import CSafeLoader as loader, CSafeDumper as dumper
+        except ImportError:
+            from yaml import SafeLoader as loader, SafeDumper as dumper
+        _yaml = (yaml, loader, dumper)
+    return _yaml
+
+
+def _read_json(path: Path) -> Any:
+    """Parse a JSON file, using orjson when it is installed"""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_json(data: Any, path: Path, indent: bool = True) -> None:
+    """
+    Write data to a JSON file, using orjson when it is installed.
+    
+    Args:
+        data: JSON-serializable data to write
+        path: Destination file path
+        indent: Pretty-print with two-space indentation if True,
+            otherwise write compact output
+    """
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        if indent:
+            json.dump(data, f, indent=2)
+        else:
+            json.dump(data, f, separators=(',', ':'))
+
+
+# Config file sections; each name is also the matching Config attribute
+_SECTIONS = ('filter', 'storage', 'safety', 'auth', 'logging')
+
+
+def _compose_yaml_node(loader: Any, anchors: Dict[str, Any]) -> Any:
+    """
+    Build a YAML node from the loader's next events.
+    
+    Mirrors PyYAML's composer so it works with both the C and pure-Python
+    loaders, which only share the event API.
+    
+    Args:
+        loader: YAML loader positioned at the start of a node
+        anchors: Anchor name to node map shared across the document
+        
+    Returns:
+        The composed node, or None if it references an unknown anchor
+    """
+    from yaml import events, nodes
+    
+    event = loader.get_event()
+    if isinstance(event, events.AliasEvent):
+        return anchors.get(event.anchor)
+    
+    if isinstance(event, events.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = loader.resolve(nodes.ScalarNode, event.value, event.implicit)
+        node = nodes.ScalarNode(tag, event.value, event.start_mark, event.end_mark,
+                                style=event.style)
+    elif isinstance(event, events.SequenceStartEvent):
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = loader.resolve(nodes.SequenceNode, None, event.implicit)
+        node = nodes.SequenceNode(tag, [], event.start_mark, None,
+                                  flow_style=event.flow_style)
+        while not loader.check_event(events.SequenceEndEvent):
+            item = _compose_yaml_node(loader, anchors)
+            if item is None:
+                return None
+            node.value.append(item)
+        node.end_mark = loader.get_event().end_mark
+    else:
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = loader.resolve(nodes.MappingNode, None, event.implicit)
+        node = nodes.MappingNode(tag, [], event.start_mark, None,
+                                 flow_style=event.flow_style)
+        while not loader.check_event(events.MappingEndEvent):
+            key = _compose_yaml_node(loader, anchors)
+            value = _compose_yaml_node(loader, anchors) if key is not None else None
+            if value is None:
+                return None
+            node.value.append((key, value))
+        node.end_mark = loader.get_event().end_mark
+    
+    if event.anchor:
+        anchors[event.anchor] = node
+    return node
+
+
+def _skip_yaml_node(loader: Any) -> bool:
+    """
+    Consume the loader's next node without building it.
+    
+    Args:
+        loader: YAML loader positioned at the start of a node
+        
+    Returns:
+        False if the node defines an anchor that later nodes could use
+    """
+    from yaml import events
+    
+    depth = 0
+    while True:
+        event = loader.get_event()
+        if getattr(event, 'anchor', None) and not isinstance(event, events.AliasEvent):
+            return False
+        if isinstance(event, events.CollectionStartEvent):
+            depth += 1
+        elif isinstance(event, events.CollectionEndEvent):
+            depth -= 1
+        if depth == 0:
+            return True
+
+
+def _read_yaml_sections(loader: Any) -> Optional[Dict[str, Any]]:
+    """
+    Read the known top-level sections from a YAML event stream.
+    
+    Values are built only for the names in _SECTIONS; other top-level
+    blocks are skipped event by event. The whole stream is still parsed,
+    so syntax errors anywhere in the file are raised as with yaml.load().
+    
+    Args:
+        loader: Fresh YAML loader for the config document
+        
+    Returns:
+        Dictionary of section data, or None if the document needs a full load
+    """
+    from yaml import events
+    
+    loader.get_event()  # StreamStartEvent
+    if loader.check_event(events.StreamEndEvent):
+        return {}
+    loader.get_event()  # DocumentStartEvent
+    if not loader.check_event(events.MappingStartEvent):
+        return None
+    loader.get_event()
+    
+    config_data = {}
+    anchors = {}
+    while not loader.check_event(events.MappingEndEvent):
+        key_event = loader.get_event()
+        if not isinstance(key_event, events.ScalarEvent) or key_event.anchor:
+            return None
+        
+        # A repeated section replaces the earlier one, as in yaml.load()
+        if key_event.value in _SECTIONS:
+            node = _compose_yaml_node(loader, anchors)
+            if node is None:
+                return None
+            config_data[key_event.value] = loader.construct_document(node)
+        elif not _skip_yaml_node(loader):
+            return None
+    
+    loader.get_event()  # MappingEndEvent
+    loader.get_event()  # DocumentEndEvent
+    
+    # Leave multi-document streams to yaml.load(), which rejects them
+    if not loader.check_event(events.StreamEndEvent):
+        return None
+    return config_data
+
+
+def _load_yaml_sections(config_path: Path) -> Any:
+    """
+    Parse a YAML config file, building only the sections Config uses.
+    
+    Falls back to a full yaml.load() for documents the section reader
+    can't handle, such as non-mapping roots or anchors in skipped blocks.
+    
+    Args:
+        config_path: Path to the YAML configuration file
+        
+    Returns:
+        Parsed configuration data
+    """
+    yaml, loader_class, _ = _import_yaml()
+    
+    # Loading from the open file keeps its name in error messages
+    with open(config_path, 'rb') as f:
+        loader = loader_class(f)
+        try:
+            config_data = _read_yaml_sections(loader)
+        finally:
+            loader.dispose()
+        
+        if config_data is None:
+            f.seek(0)
+            config_data = yaml.load(f, Loader=loader_class)
+    return config_data
+
+
+def _cached_json_path(path: Path) -> Path:
+    """Return the JSON sidecar path used to cache a parsed YAML file"""
+    return path.with_suffix(path.suffix + '.cache.json')
+
+
+def _load_yaml_cached(config_path: Path) -> Any:
+    """
+    Load a YAML file, reusing its JSON sidecar when it is up to date.
+    
+    The sidecar is rewritten whenever the YAML source is newer than it,
+    so editing the YAML file invalidates the cache automatically.
+    
+    Args:
+        config_path: Path to the YAML configuration file
+        
+    Returns:
+        Parsed configuration data
+    """
+    cache_path = _cached_json_path(config_path)
+    
+    # Reuse the sidecar if it was written after the last YAML edit
+    try:
+        if cache_path.stat().st_mtime >= config_path.stat().st_mtime:
+            return _read_json(cache_path)
+    except (OSError, ValueError):
+        pass
+    
+    config_data = _load_yaml_sections(config_path)
+    
+    # Write the sidecar atomically; a failed write only costs a reparse
+    tmp_path = cache_path.with_suffix('.tmp')
+    try:
+        _write_json(config_data, tmp_path, indent=False)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError):
+        tmp_path.unlink(missing_ok=True)
+    
+    return config_data
+
+
+def _dump_yaml(data: Any, path: Path) -> None:
+    """Write data to a YAML file in block style"""
+    yaml, _, dumper = _import_yaml()
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.dump(data, f, Dumper=dumper, default_flow_style=False, indent=2)
+
+
+# Config file readers and writers keyed by lowercase file suffix
+_LOADERS = {'.yaml': _load_yaml_cached, '.yml': _load_yaml_cached, '.json': _read_json}
+_DUMPERS = {'.yaml': _dump_yaml, '.yml': _dump_yaml, '.json': _write_json}
+
+
+# Default values for list settings; each instance gets its own copy
+_DEFAULT_NEWSLETTER_DOMAINS = (
+    'noreply@', 'no-reply@', 'newsletter@', 'marketing@',
+    'notifications@', 'updates@', 'support@'
+)
+_DEFAULT_EXCLUDE_LABELS = ('IMPORTANT', 'STARRED')
+_DEFAULT_EXCLUDE_FOLDERS = ('SENT', 'DRAFTS')
+_DEFAULT_SCOPES = (
+    'https://www.googleapis.com/auth/gmail.readonly',
+    'https://www.googleapis.com/auth/gmail.modify'
+)
+
+
+@dataclass(slots=True)
 class FilterConfig:
     """Email filtering configuration settings"""
     # Time-based filters
@@ -27,40 +315,20 @@ class FilterConfig:
     large_attachment_mb: float = 10.0
     
     # Sender-based filters
-    exclude_senders: list = None
-    include_senders: list = None
-    newsletter_domains: list = None
+    exclude_senders: list = field(default_factory=list)
+    include_senders: list = field(default_factory=list)
+    newsletter_domains: list = field(default_factory=lambda: list(_DEFAULT_NEWSLETTER_DOMAINS))
     
     # Content-based filters
-    exclude_labels: list = None
-    include_labels: list = None
-    exclude_folders: list = None
+    exclude_labels: list = field(default_factory=lambda: list(_DEFAULT_EXCLUDE_LABELS))
+    include_labels: list = field(default_factory=list)
+    exclude_folders: list = field(default_factory=lambda: list(_DEFAULT_EXCLUDE_FOLDERS))
     
     # Custom search queries
-    custom_queries: list = None
-    
-    def __post_init__(self):
-        """Initialize list fields to avoid mutable default arguments"""
-        if self.exclude_senders is None:
-            self.exclude_senders = []
-        if self.include_senders is None:
-            self.include_senders = []
-        if self.newsletter_domains is None:
-            self.newsletter_domains = [
-                'noreply@', 'no-reply@', 'newsletter@', 'marketing@',
-                'notifications@', 'updates@', 'support@'
-            ]
-        if self.exclude_labels is None:
-            self.exclude_labels = ['IMPORTANT', 'STARRED']
-        if self.include_labels is None:
-            self.include_labels = []
-        if self.exclude_folders is None:
-            self.exclude_folders = ['SENT', 'DRAFTS']
-        if self.custom_queries is None:
-            self.custom_queries = []
-
-
-@dataclass
+    custom_queries: list = field(default_factory=list)
+
+
+@dataclass(slots=True)
 class StorageConfig:
     """Local storage configuration settings"""
     base_path: str = "./gmail_archive"
@@ -69,9 +337,10 @@ class StorageConfig:
     compress_archives: bool = True
     encryption_enabled: bool = True
     max_file_size_mb: int = 100  # Max size per archive file
+    index_file: Optional[str] = None  # Local SQLite index; defaults to message_index.db in base_path
     
     
-@dataclass
+@dataclass(slots=True)
 class SafetyConfig:
     """Safety and verification settings"""
     dry_run_mode: bool = True
@@ -80,27 +349,20 @@ class SafetyConfig:
     soft_delete: bool = True  # Move to trash vs permanent delete
     batch_size: int = 50  # Emails processed per batch
     rate_limit_delay: float = 0.1  # Seconds between API calls
+    max_workers: int = 4  # Batch requests sent to the Gmail API at once
     max_retries: int = 3
     enable_rollback: bool = True
     
 
-@dataclass
+@dataclass(slots=True)
 class AuthConfig:
     """Authentication configuration"""
     credentials_file: str = "credentials/client_secret.json"
     token_file: str = "credentials/token.json"
-    scopes: list = None
-    
-    def __post_init__(self):
-        """Initialize OAuth2 scopes for Gmail API"""
-        if self.scopes is None:
-            self.scopes = [
-                'https://www.googleapis.com/auth/gmail.readonly',
-                'https://www.googleapis.com/auth/gmail.modify'
-            ]
+    scopes: list = field(default_factory=lambda: list(_DEFAULT_SCOPES))  # OAuth2 scopes for Gmail API
 
 
-@dataclass
+@dataclass(slots=True)
 class LoggingConfig:
     """Logging and monitoring configuration"""
     log_level: str = "INFO"
@@ -112,6 +374,84 @@ class LoggingConfig:
     log_retention_days: int = 30
 
 
+# Field names of each settings dataclass, in declaration order
+_FIELD_NAMES = {
+    cls: tuple(f.name for f in fields(cls))
+    for cls in (FilterConfig, StorageConfig, SafetyConfig, AuthConfig, LoggingConfig)
+}
+
+
+def _make_applier(cls: type) -> Callable[[Any, Dict[str, Any]], None]:
+    """
+    Generate a function that copies a dataclass's fields from a dict.
+    
+    The generated function has one guarded assignment per field, so
+    loading a section runs straight-line code instead of a generic loop.
+    
+    Args:
+        cls: Settings dataclass to generate the function for
+        
+    Returns:
+        Function taking (instance, data) that assigns known fields from data
+    """
+    lines = ['def apply(instance, data):']
+    for name in _FIELD_NAMES[cls]:
+        lines.append(f'    if {name!r} in data: instance.{name} = data[{name!r}]')
+    namespace = {}
+    exec('\n'.join(lines), namespace)
+    return namespace['apply']
+
+
+# Generated field appliers used when loading each config section
+_APPLIERS = {cls: _make_applier(cls) for cls in _FIELD_NAMES}
+
+
+def _make_exporter(cls: type) -> Callable[[Any], Dict[str, Any]]:
+    """
+    Generate a function that converts a settings dataclass to a dict.
+    
+    The generated function builds the dict as a single literal with the
+    fields in declaration order. List fields are copied so the result is
+    independent of the instance. Settings only hold primitives and flat
+    lists, so no deep copy is needed.
+    
+    Args:
+        cls: Settings dataclass to generate the function for
+        
+    Returns:
+        Function taking an instance and returning its fields as a dict
+    """
+    items = []
+    for f in fields(cls):
+        value = f'instance.{f.name}'
+        if f.type is list:
+            value = f'(list({value}) if isinstance({value}, list) else {value})'
+        items.append(f'{f.name!r}: {value}')
+    namespace = {}
+    exec(f"def export(instance):\n    return {{{', '.join(items)}}}", namespace)
+    return namespace['export']
+
+
+# Generated dict builders used when saving each config section
+_EXPORTERS = {cls: _make_exporter(cls) for cls in _FIELD_NAMES}
+
+
+def _parent_dir(path: str) -> str:
+    """Return the parent directory of a path, matching Path(path).parent"""
+    return os.path.dirname(os.path.normpath(path)) or '.'
+
+
+# Export formats accepted by validate()
+_VALID_EXPORT_FORMATS = frozenset(('mbox', 'eml', 'json'))
+
+# How long get_filter_date_cutoff() reuses a computed cutoff
+_CUTOFF_CACHE_SECONDS = 60
+
+# Directories already created by this process, so repeated Config()
+# construction skips the mkdir calls
+_DIR_CACHE: set = set()
+
+
 class Config:
     """
     Main configuration class that manages all application settings.
@@ -134,6 +474,9 @@ class Config:
         self.auth = AuthConfig()
         self.logging = LoggingConfig()
         
+        # Last (older_than_days, cutoff, monotonic time) from get_filter_date_cutoff
+        self._cutoff_cache = None
+        
         # Load from file if provided
         if config_file and os.path.exists(config_file):
             self.load_from_file(config_file)
@@ -157,25 +500,23 @@ class Config:
         if not config_path.exists():
             raise FileNotFoundError(f"Configuration file not found: {config_file}")
         
-        with open(config_path, 'r', encoding='utf-8') as f:
-            if config_path.suffix.lower() in ['.yaml', '.yml']:
-                config_data = yaml.safe_load(f)
-            elif config_path.suffix.lower() == '.json':
-                config_data = json.load(f)
-            else:
-                raise ValueError(f"Unsupported config file format: {config_path.suffix}")
+        loader = _LOADERS.get(config_path.suffix.lower())
+        if loader is None:
+            raise ValueError(f"Unsupported config file format: {config_path.suffix}")
+        config_data = loader(config_path)
+        
+        # Intern section names so the lookups below compare by identity;
+        # YAML can also produce int, bool or None keys, which are left alone
+        config_data = {
+            sys.intern(key) if isinstance(key, str) else key: value
+            for key, value in config_data.items()
+        }
         
         # Update configurations with loaded data
-        if 'filter' in config_data:
-            self._update_dataclass(self.filter, config_data['filter'])
-        if 'storage' in config_data:
-            self._update_dataclass(self.storage, config_data['storage'])
-        if 'safety' in config_data:
-            self._update_dataclass(self.safety, config_data['safety'])
-        if 'auth' in config_data:
-            self._update_dataclass(self.auth, config_data['auth'])
-        if 'logging' in config_data:
-            self._update_dataclass(self.logging, config_data['logging'])
+        for section in _SECTIONS:
+            section_data = config_data.get(section)
+            if section_data is not None:
+                self._update_dataclass(getattr(self, section), section_data)
     
     def save_to_file(self, config_file: str) -> None:
         """
@@ -183,26 +524,23 @@ class Config:
         
         Args:
             config_file: Path to save configuration file
+            
+        Raises:
+            ValueError: If file format is not supported
         """
         config_path = Path(config_file)
+        dumper = _DUMPERS.get(config_path.suffix.lower())
+        if dumper is None:
+            raise ValueError(f"Unsupported config file format: {config_path.suffix}")
         config_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Convert all dataclasses to dictionaries
-        config_data = {
-            'filter': asdict(self.filter),
-            'storage': asdict(self.storage),
-            'safety': asdict(self.safety),
-            'auth': asdict(self.auth),
-            'logging': asdict(self.logging)
-        }
+        config_data = {}
+        for section in _SECTIONS:
+            settings = getattr(self, section)
+            config_data[section] = _EXPORTERS[type(settings)](settings)
         
-        with open(config_path, 'w', encoding='utf-8') as f:
-            if config_path.suffix.lower() in ['.yaml', '.yml']:
-                yaml.dump(config_data, f, default_flow_style=False, indent=2)
-            elif config_path.suffix.lower() == '.json':
-                json.dump(config_data, f, indent=2)
-            else:
-                raise ValueError(f"Unsupported config file format: {config_path.suffix}")
+        dumper(config_data, config_path)
     
     def _update_dataclass(self, dataclass_instance: Any, update_dict: Dict[str, Any]) -> None:
         """
@@ -212,30 +550,42 @@ class Config:
             dataclass_instance: Dataclass instance to update
             update_dict: Dictionary with new values
         """
-        for key, value in update_dict.items():
-            if hasattr(dataclass_instance, key):
-                setattr(dataclass_instance, key, value)
+        _APPLIERS[type(dataclass_instance)](dataclass_instance, update_dict)
     
     def _ensure_directories(self) -> None:
         """Create required directories if they don't exist"""
-        directories = [
-            Path(self.storage.base_path),
-            Path(self.auth.credentials_file).parent,
-            Path(self.logging.log_file).parent,
-            Path(self.logging.audit_log).parent,
-        ]
+        directories = (
+            self.storage.base_path,
+            _parent_dir(self.auth.credentials_file),
+            _parent_dir(self.logging.log_file),
+            _parent_dir(self.logging.audit_log),
+        )
         
         for directory in directories:
-            directory.mkdir(parents=True, exist_ok=True)
+            if directory in _DIR_CACHE:
+                continue
+            os.makedirs(directory, exist_ok=True)
+            _DIR_CACHE.add(directory)
     
     def get_filter_date_cutoff(self) -> datetime:
         """
         Calculate the date cutoff for email filtering.
         
+        The cutoff is reused for up to a minute while older_than_days is
+        unchanged, so callers in per-email loops don't recompute it.
+        
         Returns:
             datetime: Cutoff date for filtering old emails
         """
-        return datetime.now() - timedelta(days=self.filter.older_than_days)
+        days = self.filter.older_than_days
+        now = time.monotonic()
+        cached = self._cutoff_cache
+        if cached and cached[0] == days and now - cached[2] < _CUTOFF_CACHE_SECONDS:
+            return cached[1]
+        
+        cutoff = datetime.now() - timedelta(days=days)
+        self._cutoff_cache = (days, cutoff, now)
+        return cutoff
     
     def validate(self) -> list:
         """
@@ -247,23 +597,29 @@ class Config:
         errors = []
         
         # Validate storage path
-        storage_path = Path(self.storage.base_path)
-        if not storage_path.parent.exists():
-            errors.append(f"Storage parent directory doesn't exist: {storage_path.parent}")
+        storage_parent = _parent_dir(self.storage.base_path)
+        if not os.path.isdir(storage_parent):
+            errors.append(f"Storage parent directory doesn't exist: {storage_parent}")
         
         # Validate export format
-        valid_formats = ['mbox', 'eml', 'json']
-        if self.storage.export_format not in valid_formats:
-            errors.append(f"Invalid export format: {self.storage.export_format}. Must be one of: {valid_formats}")
+        if self.storage.export_format not in _VALID_EXPORT_FORMATS:
+            errors.append(
+                f"Invalid export format: {self.storage.export_format}. "
+                f"Must be one of: {sorted(_VALID_EXPORT_FORMATS)}"
+            )
         
         # Validate batch size
         if self.safety.batch_size <= 0 or self.safety.batch_size > 1000:
             errors.append(f"Batch size must be between 1 and 1000: {self.safety.batch_size}")
         
+        # Validate request concurrency
+        if self.safety.max_workers < 1:
+            errors.append(f"Max workers must be at least 1: {self.safety.max_workers}")
+        
         # Validate credentials file path
-        creds_path = Path(self.auth.credentials_file)
-        if not creds_path.parent.exists():
-            errors.append(f"Credentials directory doesn't exist: {creds_path.parent}")
+        creds_parent = _parent_dir(self.auth.credentials_file)
+        if not os.path.isdir(creds_parent):
+            errors.append(f"Credentials directory doesn't exist: {creds_parent}")
         
         return errors
 
@@ -7,26 +7,133 @@ various criteria like date, size, sender, content, and custom rules.
 
 import re
 import logging
-from datetime import datetime, timedelta
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
 from typing import List, Dict, Any, Optional, Callable
-from dataclasses import dataclass
 from email.utils import parseaddr
 
 from config import FilterConfig
 
+# google-re2 is optional; its linear-time engine is used for the keyword
+# alternations when installed, with the standard re module otherwise
+try:
+    import re2 as _keyword_re
+except ImportError:
+    _keyword_re = re
 
-@dataclass
+
+# Bucket upper bounds for get_filter_stats distributions; a value lands in
+# the first bucket whose bound it is below, or the last bucket otherwise
+_SIZE_BUCKET_BOUNDS = (1 * 1024 * 1024, 10 * 1024 * 1024)  # bytes
+_SIZE_BUCKET_NAMES = ('small', 'medium', 'large')
+_AGE_BUCKET_BOUNDS = (30, 365)  # days
+_AGE_BUCKET_NAMES = ('recent', 'medium', 'old')
+
+# Categories counted by get_filter_stats, and emails per worker task when
+# the stats run across processes
+_STATS_CATEGORIES = ('newsletter', 'promotional', 'automated', 'receipt', 'social')
+_STATS_CHUNK_SIZE = 1000
+
+
+# Fast paths for the common From header shapes: "Name <addr>" and a bare
+# address. Anything else (quoting, groups, multiple addresses) goes
+# through email.utils.parseaddr
+_ADDRESS = r'[^\s<>"(),;:\\\[\]@]+@[^\s<>"(),;:\\\[\]@]+'
+_NAMED_ADDRESS_RE = re.compile(r'[^<>@",]*<(' + _ADDRESS + r')>\s*')
+_BARE_ADDRESS_RE = re.compile(r'\s*(' + _ADDRESS + r')\s*')
+
+
+def _extract_email(sender: str) -> str:
+    """
+    Extract the lowercased email address from a From header value.
+    
+    Args:
+        sender: Raw sender string, e.g. "Name <user@example.com>"
+        
+    Returns:
+        Bare email address, or an empty string if none can be parsed
+    """
+    match = _NAMED_ADDRESS_RE.fullmatch(sender) or _BARE_ADDRESS_RE.fullmatch(sender)
+    if match:
+        return match.group(1).lower()
+    return parseaddr(sender)[1].lower()
+
+
+def _compile_substrings(values: List[str]) -> Optional[re.Pattern]:
+    """
+    Compile literal strings into one regex matching any of them, lowercased.
+    
+    Args:
+        values: Strings to match as plain substrings
+        
+    Returns:
+        Compiled alternation pattern, or None if values is empty
+    """
+    if not values:
+        return None
+    return re.compile('|'.join(re.escape(value.lower()) for value in values))
+
+
+def _score_categories(newsletter_hits: int, newsletter_domain_hits: int,
+                      automated_sender_hits: int, automated_subject_hits: int,
+                      promotional_hits: int, receipt_hits: int) -> Dict[str, Any]:
+    """
+    Turn keyword hit counts into category flags and confidence scores.
+    
+    Args:
+        newsletter_hits: Newsletter keywords found in the subject
+        newsletter_domain_hits: Newsletter sender patterns found in the address
+        automated_sender_hits: Automated keywords found in the sender address
+        automated_subject_hits: Automated keywords found in the subject
+        promotional_hits: Promotional keywords found in the subject
+        receipt_hits: Receipt keywords found in the subject
+        
+    Returns:
+        Dictionary with categorization results
+    """
+    newsletter_score = 0.3 * newsletter_hits + 0.4 * newsletter_domain_hits
+    automated_score = 0.5 * automated_sender_hits + 0.3 * automated_subject_hits
+    promotional_score = 0.2 * promotional_hits
+    receipt_score = 0.3 * receipt_hits
+    
+    return {
+        'is_newsletter': newsletter_score > 0.5,
+        'is_promotional': promotional_score > 0.4,
+        'is_automated': automated_score > 0.5,
+        'is_social': False,
+        'is_receipt': receipt_score > 0.6,
+        'confidence_scores': {
+            'newsletter': min(newsletter_score, 1.0),
+            'automated': min(automated_score, 1.0),
+            'promotional': min(promotional_score, 1.0),
+            'receipt': min(receipt_score, 1.0),
+        }
+    }
+
+
+@dataclass(slots=True)
 class FilterResult:
     """Result of filtering operation with metadata"""
     should_process: bool
     reason: str
     confidence: float  # 0.0 to 1.0
     filter_type: str
-    metadata: Dict[str, Any] = None
-    
-    def __post_init__(self):
-        if self.metadata is None:
-            self.metadata = {}
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+# Shared result for emails that pass every filter, so its metadata is
+# read-only
+_DEFAULT_PASS = FilterResult(
+    should_process=True,
+    reason="Passed all filter criteria",
+    confidence=0.8,
+    filter_type="inclusive",
+    metadata=MappingProxyType({'passed_all_filters': True})
+)
 
 
 class EmailFilter:
@@ -52,41 +159,77 @@ class EmailFilter:
         self.config = config
         self.logger = logging.getLogger(__name__)
         
+        # Label rules as sets so each email needs one hashed lookup per label
+        self._exclude_labels = frozenset(config.exclude_labels)
+        self._exclude_folders = frozenset(config.exclude_folders)
+        self._include_labels = frozenset(config.include_labels or ())
+        
+        # Time filter reference points, fixed for the duration of a batch
+        self._batch_cutoffs = None
+        
+        # Gmail query for this filter's config, built on first use
+        self._cached_query = None
+        
+        # Last From header seen and its lowercased form, shared by the
+        # filter checks and categorization of the same email
+        self._last_sender = ('', '')
+        
         # Compile regex patterns for efficiency
         self._compile_patterns()
+        
+        # Memoize keyword scans on (subject, sender); newsletters and other
+        # bulk mail repeat both across many messages
+        self._count_category_hits = lru_cache(maxsize=4096)(self._count_category_hits)
+        
+        # Filters applied in order of importance; exclusion rules are cheap
+        # set/substring checks and reject the most mail, so they run first
+        self._filter_chain = (
+            self._check_exclusions,
+            self._check_time_filters,
+            self._check_size_filters,
+            self._check_sender_filters,
+            self._check_content_filters,
+            # _check_custom_queries is left out while it is a placeholder
+            # that accepts everything; add it back once it filters
+        )
     
     def _compile_patterns(self):
         """Pre-compile regex patterns for email filtering"""
-        # Newsletter/marketing patterns
-        self.newsletter_patterns = [
-            re.compile(pattern, re.IGNORECASE) 
-            for pattern in [
-                r'unsubscribe',
-                r'newsletter',
-                r'marketing',
-                r'promotional?',
-                r'offer',
-                r'deal',
-                r'sale',
-                r'discount',
-                r'click here',
-                r'limited time',
-            ]
-        ]
-        
-        # Automated email patterns
-        self.automated_patterns = [
-            re.compile(pattern, re.IGNORECASE)
-            for pattern in [
-                r'noreply',
-                r'no-reply',
-                r'donotreply',
-                r'automated',
-                r'notification',
-                r'alert',
-                r'system',
-            ]
-        ]
+        # Configured sender rules; senders are lowercased before matching
+        self.exclude_sender_re = _compile_substrings(self.config.exclude_senders)
+        self._exclude_senders_lower = tuple(
+            (value.lower(), value) for value in self.config.exclude_senders
+        )
+        self.include_sender_re = _compile_substrings(self.config.include_senders)
+        self._newsletter_domains_re = _compile_substrings(self.config.newsletter_domains)
+        
+        # Newsletter/marketing keywords, combined into one alternation
+        self.newsletter_re = _keyword_re.compile(
+            r'(?i)unsubscribe|newsletter|marketing|promotional?|offer|deal|sale'
+            r'|discount|click here|limited time'
+        )
+        
+        # Automated email keywords, combined into one alternation
+        self.automated_re = _keyword_re.compile(
+            r'(?i)noreply|no-reply|donotreply|automated|notification|alert|system'
+        )
+        
+        # Promotional and receipt keywords, each assigned its own bit so a
+        # subject's hits fold into one mask that is counted per category
+        promotional_keywords = ['sale', 'deal', 'offer', 'discount', 'limited time', '%']
+        receipt_keywords = ['receipt', 'invoice', 'payment', 'order', 'purchase', 'transaction']
+        self.subject_keywords = {
+            keyword: 1 << index
+            for index, keyword in enumerate(promotional_keywords + receipt_keywords)
+        }
+        self._promotional_mask = (1 << len(promotional_keywords)) - 1
+        self._receipt_mask = ((1 << len(self.subject_keywords)) - 1) ^ self._promotional_mask
+        
+        # One pass finds every keyword; the lookahead also reports
+        # keywords that overlap, matching plain substring tests
+        self.subject_keyword_re = re.compile(
+            '(?=(' + '|'.join(map(re.escape, self.subject_keywords)) + '))'
+        )
     
     def should_process_email(self, email_metadata: Dict[str, Any]) -> FilterResult:
         """
@@ -98,32 +241,40 @@ class EmailFilter:
         Returns:
             FilterResult indicating whether to process this email
         """
-        # Apply filters in order of importance
-        filters = [
-            self._check_exclusions,
-            self._check_time_filters,
-            self._check_size_filters,
-            self._check_sender_filters,
-            self._check_content_filters,
-            self._check_custom_queries,
-        ]
-        
-        for filter_func in filters:
-            result = filter_func(email_metadata)
-            if result and not result.should_process:
-                # Email excluded by this filter
-                return result
+        rejection = self._evaluate(email_metadata)
+        if rejection is None:
+            # If no filters excluded it, include it for processing
+            return _DEFAULT_PASS
         
-        # If no filters excluded it, include it for processing
+        filter_type, reason, confidence, details = rejection
         return FilterResult(
-            should_process=True,
-            reason="Passed all filter criteria",
-            confidence=0.8,
-            filter_type="inclusive",
-            metadata={'passed_all_filters': True}
+            should_process=False,
+            reason=reason,
+            confidence=confidence,
+            filter_type=filter_type,
+            metadata=details
         )
     
-    def _check_exclusions(self, metadata: Dict[str, Any]) -> Optional[FilterResult]:
+    def _evaluate(self, email_metadata: Dict[str, Any]) -> Optional[tuple]:
+        """
+        Run the filter chain without building a FilterResult.
+        
+        Args:
+            email_metadata: Email metadata from Gmail API
+            
+        Returns:
+            None if the email passes every filter, otherwise the rejecting
+            filter's (filter_type, reason, confidence, metadata) tuple
+        """
+        for filter_func in self._filter_chain:
+            rejection = filter_func(email_metadata)
+            if rejection is not None:
+                # Email excluded by this filter
+                return rejection
+        
+        return None
+    
+    def _check_exclusions(self, metadata: Dict[str, Any]) -> Optional[tuple]:
         """
         Check if email should be excluded based on protection rules.
         
@@ -131,46 +282,112 @@ class EmailFilter:
             metadata: Email metadata
             
         Returns:
-            FilterResult if email should be excluded, None otherwise
+            Rejection tuple if email should be excluded, None otherwise
         """
         # Check for important labels
         label_ids = metadata.get('label_ids', [])
-        for exclude_label in self.config.exclude_labels:
-            if exclude_label in label_ids:
-                return FilterResult(
-                    should_process=False,
-                    reason=f"Has excluded label: {exclude_label}",
-                    confidence=1.0,
-                    filter_type="exclusion",
-                    metadata={'excluded_label': exclude_label}
-                )
+        excluded = self._exclude_labels.intersection(label_ids)
+        if excluded:
+            # Report the first match in configured order
+            exclude_label = next(label for label in self.config.exclude_labels if label in excluded)
+            return (
+                "exclusion",
+                f"Has excluded label: {exclude_label}",
+                1.0,
+                {'excluded_label': exclude_label}
+            )
         
         # Check for excluded folders
-        for exclude_folder in self.config.exclude_folders:
-            if exclude_folder in label_ids:
-                return FilterResult(
-                    should_process=False,
-                    reason=f"In excluded folder: {exclude_folder}",
-                    confidence=1.0,
-                    filter_type="exclusion",
-                    metadata={'excluded_folder': exclude_folder}
-                )
+        excluded = self._exclude_folders.intersection(label_ids)
+        if excluded:
+            exclude_folder = next(folder for folder in self.config.exclude_folders if folder in excluded)
+            return (
+                "exclusion",
+                f"In excluded folder: {exclude_folder}",
+                1.0,
+                {'excluded_folder': exclude_folder}
+            )
         
         # Check for excluded senders
-        sender = metadata.get('from', '').lower()
-        for exclude_sender in self.config.exclude_senders:
-            if exclude_sender.lower() in sender:
-                return FilterResult(
-                    should_process=False,
-                    reason=f"From excluded sender: {exclude_sender}",
-                    confidence=1.0,
-                    filter_type="exclusion",
-                    metadata={'excluded_sender': exclude_sender}
-                )
+        sender = self._lowered_sender(metadata)
+        if self.exclude_sender_re and self.exclude_sender_re.search(sender):
+            # Report the first match in configured order
+            exclude_sender = next(
+                value for lowered, value in self._exclude_senders_lower if lowered in sender
+            )
+            return (
+                "exclusion",
+                f"From excluded sender: {exclude_sender}",
+                1.0,
+                {'excluded_sender': exclude_sender}
+            )
         
         return None
     
-    def _check_time_filters(self, metadata: Dict[str, Any]) -> Optional[FilterResult]:
+    def _lowered_sender(self, metadata: Dict[str, Any]) -> str:
+        """
+        Return the email's From header lowercased, reusing the last result.
+        
+        Args:
+            metadata: Email metadata
+            
+        Returns:
+            Lowercased From header, or '' if missing
+        """
+        sender = metadata.get('from', '')
+        last = self._last_sender
+        if last[0] is not sender:
+            # One tuple, so concurrent callers never see a mismatched pair
+            last = self._last_sender = (sender, sender.lower())
+        return last[1]
+    
+    def begin_batch(self, now: Optional[datetime] = None) -> None:
+        """
+        Pin the time used by time filters until end_batch() is called.
+        
+        Use this around loops of should_process_email() calls so every
+        email in the batch is judged against the same "now".
+        
+        Args:
+            now: Reference time; defaults to the current time
+        """
+        if now is None:
+            now = datetime.now()
+        elif now.tzinfo is not None:
+            # Naive email dates are local, so keep a naive local reference
+            now = now.astimezone().replace(tzinfo=None)
+        self._batch_cutoffs = self._compute_cutoffs(now)
+    
+    def end_batch(self) -> None:
+        """Return to reading the clock for each time filter check"""
+        self._batch_cutoffs = None
+    
+    def _compute_cutoffs(self, now: datetime) -> tuple:
+        """
+        Compute the current time and time filter cutoffs.
+        
+        Naive email dates are compared in local time and timezone-aware
+        ones in UTC, so both variants are prepared.
+        
+        Args:
+            now: Current local time (naive)
+            
+        Returns:
+            Tuple indexed by whether the email date is timezone-aware, each
+            entry being (now, older_than cutoff, newer_than cutoff) with
+            None for unset filters
+        """
+        cutoffs = []
+        for reference in (now, now.astimezone(timezone.utc)):
+            older_cutoff = newer_cutoff = None
+            if self.config.older_than_days:
+                older_cutoff = reference - timedelta(days=self.config.older_than_days)
+            if self.config.newer_than_days:
+                newer_cutoff = reference - timedelta(days=self.config.newer_than_days)
+            cutoffs.append((reference, older_cutoff, newer_cutoff))
+        return tuple(cutoffs)
+    
+    def _check_time_filters(self, metadata: Dict[str, Any]) -> Optional[tuple]:
         """
         Apply time-based filtering criteria.
         
@@ -178,46 +395,42 @@ class EmailFilter:
             metadata: Email metadata
             
         Returns:
-            FilterResult if time criteria not met, None otherwise
+            Rejection tuple if time criteria not met, None otherwise
         """
         email_date = metadata.get('date')
         if not email_date:
             # If we can't parse the date, be conservative
-            return FilterResult(
-                should_process=False,
-                reason="Unable to parse email date",
-                confidence=0.5,
-                filter_type="time",
-                metadata={'date_parse_error': True}
+            return (
+                "time",
+                "Unable to parse email date",
+                0.5,
+                {'date_parse_error': True}
             )
         
-        now = datetime.now(email_date.tzinfo) if email_date.tzinfo else datetime.now()
+        cutoffs = self._batch_cutoffs or self._compute_cutoffs(datetime.now())
+        now, older_cutoff, newer_cutoff = cutoffs[email_date.tzinfo is not None]
         
         # Check older_than filter
-        if self.config.older_than_days:
-            cutoff_date = now - timedelta(days=self.config.older_than_days)
-            if email_date > cutoff_date:
-                return FilterResult(
-                    should_process=False,
-                    reason=f"Email too recent (newer than {self.config.older_than_days} days)",
-                    confidence=1.0,
-                    filter_type="time",
-                    metadata={
+        if older_cutoff is not None:
+            if email_date > older_cutoff:
+                return (
+                    "time",
+                    f"Email too recent (newer than {self.config.older_than_days} days)",
+                    1.0,
+                    {
                         'email_age_days': (now - email_date).days,
                         'cutoff_days': self.config.older_than_days
                     }
                 )
         
         # Check newer_than filter (if set)
-        if self.config.newer_than_days:
-            cutoff_date = now - timedelta(days=self.config.newer_than_days)
-            if email_date < cutoff_date:
-                return FilterResult(
-                    should_process=False,
-                    reason=f"Email too old (older than {self.config.newer_than_days} days)",
-                    confidence=1.0,
-                    filter_type="time",
-                    metadata={
+        if newer_cutoff is not None:
+            if email_date < newer_cutoff:
+                return (
+                    "time",
+                    f"Email too old (older than {self.config.newer_than_days} days)",
+                    1.0,
+                    {
                         'email_age_days': (now - email_date).days,
                         'min_age_days': self.config.newer_than_days
                     }
@@ -225,7 +438,7 @@ class EmailFilter:
         
         return None
     
-    def _check_size_filters(self, metadata: Dict[str, Any]) -> Optional[FilterResult]:
+    def _check_size_filters(self, metadata: Dict[str, Any]) -> Optional[tuple]:
         """
         Apply size-based filtering criteria.
         
@@ -233,34 +446,32 @@ class EmailFilter:
             metadata: Email metadata
             
         Returns:
-            FilterResult if size criteria not met, None otherwise
+            Rejection tuple if size criteria not met, None otherwise
         """
         size_bytes = metadata.get('size_estimate', 0)
         size_mb = size_bytes / (1024 * 1024) if size_bytes else 0
         
         # Check minimum size filter
         if self.config.min_size_mb and size_mb < self.config.min_size_mb:
-            return FilterResult(
-                should_process=False,
-                reason=f"Email too small ({size_mb:.2f} MB < {self.config.min_size_mb} MB)",
-                confidence=0.8,
-                filter_type="size",
-                metadata={'size_mb': size_mb, 'min_size_mb': self.config.min_size_mb}
+            return (
+                "size",
+                f"Email too small ({size_mb:.2f} MB < {self.config.min_size_mb} MB)",
+                0.8,
+                {'size_mb': size_mb, 'min_size_mb': self.config.min_size_mb}
             )
         
         # Check maximum size filter
         if self.config.max_size_mb and size_mb > self.config.max_size_mb:
-            return FilterResult(
-                should_process=False,
-                reason=f"Email too large ({size_mb:.2f} MB > {self.config.max_size_mb} MB)",
-                confidence=0.8,
-                filter_type="size",
-                metadata={'size_mb': size_mb, 'max_size_mb': self.config.max_size_mb}
+            return (
+                "size",
+                f"Email too large ({size_mb:.2f} MB > {self.config.max_size_mb} MB)",
+                0.8,
+                {'size_mb': size_mb, 'max_size_mb': self.config.max_size_mb}
             )
         
         return None
     
-    def _check_sender_filters(self, metadata: Dict[str, Any]) -> Optional[FilterResult]:
+    def _check_sender_filters(self, metadata: Dict[str, Any]) -> Optional[tuple]:
         """
         Apply sender-based filtering criteria.
         
@@ -268,31 +479,23 @@ class EmailFilter:
             metadata: Email metadata
             
         Returns:
-            FilterResult if sender criteria not met, None otherwise
+            Rejection tuple if sender criteria not met, None otherwise
         """
-        sender = metadata.get('from', '').lower()
-        sender_email = parseaddr(sender)[1].lower()
-        
         # Check include_senders filter (whitelist)
-        if self.config.include_senders:
-            included = False
-            for include_sender in self.config.include_senders:
-                if include_sender.lower() in sender:
-                    included = True
-                    break
-            
-            if not included:
-                return FilterResult(
-                    should_process=False,
-                    reason="Sender not in whitelist",
-                    confidence=0.9,
-                    filter_type="sender",
-                    metadata={'sender': sender_email, 'whitelist_only': True}
+        if self.include_sender_re:
+            sender = self._lowered_sender(metadata)
+            if not self.include_sender_re.search(sender):
+                sender_email = _extract_email(sender)
+                return (
+                    "sender",
+                    "Sender not in whitelist",
+                    0.9,
+                    {'sender': sender_email, 'whitelist_only': True}
                 )
         
         return None
     
-    def _check_content_filters(self, metadata: Dict[str, Any]) -> Optional[FilterResult]:
+    def _check_content_filters(self, metadata: Dict[str, Any]) -> Optional[tuple]:
         """
         Apply content-based filtering criteria.
         
@@ -300,22 +503,17 @@ class EmailFilter:
             metadata: Email metadata
             
         Returns:
-            FilterResult if content criteria not met, None otherwise
+            Rejection tuple if content criteria not met, None otherwise
         """
         # Check required labels (if any)
-        if self.config.include_labels:
+        if self._include_labels:
             label_ids = metadata.get('label_ids', [])
-            has_required_label = any(
-                label in label_ids for label in self.config.include_labels
-            )
-            
-            if not has_required_label:
-                return FilterResult(
-                    should_process=False,
-                    reason="Missing required labels",
-                    confidence=0.8,
-                    filter_type="content",
-                    metadata={
+            if self._include_labels.isdisjoint(label_ids):
+                return (
+                    "content",
+                    "Missing required labels",
+                    0.8,
+                    {
                         'required_labels': self.config.include_labels,
                         'email_labels': label_ids
                     }
@@ -323,18 +521,19 @@ class EmailFilter:
         
         return None
     
-    def _check_custom_queries(self, metadata: Dict[str, Any]) -> Optional[FilterResult]:
+    def _check_custom_queries(self, metadata: Dict[str, Any]) -> Optional[tuple]:
         """
         Apply custom Gmail search query filters.
         
         Note: This is a simplified version. Full implementation would require
-        parsing Gmail search syntax and applying it to metadata.
+        parsing Gmail search syntax and applying it to metadata. Not part of
+        the filter chain until it does.
         
         Args:
             metadata: Email metadata
             
         Returns:
-            FilterResult if custom criteria not met, None otherwise
+            Rejection tuple if custom criteria not met, None otherwise
         """
         # For now, this is a placeholder for custom query logic
         # In a full implementation, you'd parse Gmail search queries
@@ -352,59 +551,55 @@ class EmailFilter:
         Returns:
             Dictionary with categorization results
         """
-        subject = metadata.get('subject', '').lower()
-        sender = metadata.get('from', '').lower()
-        sender_email = parseaddr(sender)[1].lower()
-        
-        categories = {
-            'is_newsletter': False,
-            'is_promotional': False,
-            'is_automated': False,
-            'is_social': False,
-            'is_receipt': False,
-            'confidence_scores': {}
-        }
-        
-        # Newsletter detection
-        newsletter_score = 0.0
-        for pattern in self.newsletter_patterns:
-            if pattern.search(subject):
-                newsletter_score += 0.3
-        
-        # Check sender domain patterns
-        for domain_pattern in self.config.newsletter_domains:
-            if domain_pattern in sender_email:
-                newsletter_score += 0.4
-        
-        categories['is_newsletter'] = newsletter_score > 0.5
-        categories['confidence_scores']['newsletter'] = min(newsletter_score, 1.0)
-        
-        # Automated email detection
-        automated_score = 0.0
-        for pattern in self.automated_patterns:
-            if pattern.search(sender_email):
-                automated_score += 0.5
-            if pattern.search(subject):
-                automated_score += 0.3
-        
-        categories['is_automated'] = automated_score > 0.5
-        categories['confidence_scores']['automated'] = min(automated_score, 1.0)
-        
-        # Promotional email detection
-        promotional_keywords = ['sale', 'deal', 'offer', 'discount', 'limited time', '%']
-        promotional_score = sum(0.2 for keyword in promotional_keywords if keyword in subject)
+        hits = self._count_category_hits(metadata.get('subject', ''), self._lowered_sender(metadata))
+        return _score_categories(*hits)
+    
+    def _count_category_hits(self, subject: str, sender: str) -> tuple:
+        """
+        Count category keyword hits in an email's subject and sender.
         
-        categories['is_promotional'] = promotional_score > 0.4
-        categories['confidence_scores']['promotional'] = min(promotional_score, 1.0)
+        Results are memoized per filter instance (see __init__), since
+        bulk mail repeats the same sender and templated subject.
         
-        # Receipt detection
-        receipt_keywords = ['receipt', 'invoice', 'payment', 'order', 'purchase', 'transaction']
-        receipt_score = sum(0.3 for keyword in receipt_keywords if keyword in subject)
-        
-        categories['is_receipt'] = receipt_score > 0.6
-        categories['confidence_scores']['receipt'] = min(receipt_score, 1.0)
+        Args:
+            subject: Raw subject header
+            sender: From header, lowercased
+            
+        Returns:
+            Hit counts in _score_categories argument order
+        """
+        subject = subject.lower()
+        sender_email = _extract_email(sender)
+        
+        # Newsletter keywords in the subject and newsletter sender domains;
+        # inputs are lowercased, so each distinct match is one keyword hit
+        newsletter_hits = len(set(self.newsletter_re.findall(subject)))
+        # The combined pattern rules out most senders in one scan; matches
+        # are then counted per pattern, since overlapping ones each count
+        newsletter_domain_hits = 0
+        if self._newsletter_domains_re and self._newsletter_domains_re.search(sender_email):
+            newsletter_domain_hits = sum(
+                1 for domain_pattern in self.config.newsletter_domains
+                if domain_pattern in sender_email
+            )
         
-        return categories
+        # Automated sender/subject keywords
+        automated_sender_hits = len(set(self.automated_re.findall(sender_email)))
+        automated_subject_hits = len(set(self.automated_re.findall(subject)))
+        
+        # Promotional and receipt keywords share a single subject scan;
+        # repeated keywords set the same bit, so each counts once
+        keyword_mask = 0
+        for keyword in self.subject_keyword_re.findall(subject):
+            keyword_mask |= self.subject_keywords[keyword]
+        promotional_hits = (keyword_mask & self._promotional_mask).bit_count()
+        receipt_hits = (keyword_mask & self._receipt_mask).bit_count()
+        
+        return (
+            newsletter_hits, newsletter_domain_hits,
+            automated_sender_hits, automated_subject_hits,
+            promotional_hits, receipt_hits
+        )
     
     def build_gmail_query(self) -> str:
         """
@@ -413,6 +608,9 @@ class EmailFilter:
         Returns:
             Gmail search query string
         """
+        if self._cached_query is not None:
+            return self._cached_query
+        
         query_parts = []
         
         # Time-based filters
@@ -457,14 +655,94 @@ class EmailFilter:
         query_parts.extend(self.config.custom_queries)
         
         # Join all parts with AND logic
-        return ' '.join(query_parts)
+        self._cached_query = ' '.join(query_parts)
+        return self._cached_query
+    
+    def invalidate_query_cache(self) -> None:
+        """Discard the cached Gmail query after the filter config changes"""
+        self._cached_query = None
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        # Compiled patterns and the keyword cache are rebuilt from the
+        # config on unpickling; only the pinned batch clock is carried over
+        return {'config': self.config, '_batch_cutoffs': self._batch_cutoffs}
+    
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state['config'])
+        self._batch_cutoffs = state['_batch_cutoffs']
+    
+    def _tally_emails(self, emails_metadata: List[Dict[str, Any]]) -> tuple:
+        """
+        Tally filter outcomes, categories and distributions for a batch.
+        
+        Must run between begin_batch() and end_batch(). Worker processes
+        run it on their share of the emails in get_filter_stats.
+        
+        Args:
+            emails_metadata: Emails to tally
+            
+        Returns:
+            (would_process, excluded_by_filter, categories, size_counts, age_counts)
+        """
+        would_process = 0
+        excluded_by_filter = {}
+        category_counts = dict.fromkeys(_STATS_CATEGORIES, 0)
+        size_counts = [0] * len(_SIZE_BUCKET_NAMES)
+        age_counts = [0] * len(_AGE_BUCKET_NAMES)
+        
+        # Transpose the fields the tallies read into columns up front,
+        # so each pass below iterates a flat list
+        subjects = [metadata.get('subject', '') for metadata in emails_metadata]
+        senders = []
+        sizes = [metadata.get('size_estimate', 0) for metadata in emails_metadata]
+        dates = [metadata.get('date') for metadata in emails_metadata]
+        
+        # Check if would be processed; the filter chain reads the whole record
+        for metadata in emails_metadata:
+            rejection = self._evaluate(metadata)
+            if rejection is None:
+                would_process += 1
+            else:
+                filter_type = rejection[0]
+                excluded_by_filter[filter_type] = excluded_by_filter.get(filter_type, 0) + 1
+            # Filters that read the sender have just lowercased it
+            senders.append(self._lowered_sender(metadata))
+        
+        # Categorize emails
+        for hits in map(self._count_category_hits, subjects, senders):
+            categories = _score_categories(*hits)
+            for cat_name, is_category in categories.items():
+                if cat_name.startswith('is_') and is_category:
+                    cat_key = cat_name[3:]  # Remove 'is_' prefix
+                    if cat_key in category_counts:
+                        category_counts[cat_key] += 1
+        
+        # Size and age distributions, tallied by bucket index
+        for size in sizes:
+            size_counts[bisect_right(_SIZE_BUCKET_BOUNDS, size)] += 1
+        # Ages are bucketed by comparing dates against each bound's cutoff
+        # date, oldest first, rather than subtracting every date from now;
+        # an email is under a bound exactly when it is after its cutoff
+        age_cutoffs = tuple(
+            tuple(now - timedelta(days=days) for days in reversed(_AGE_BUCKET_BOUNDS))
+            for now, _, _ in self._batch_cutoffs
+        )
+        last_age_bucket = len(_AGE_BUCKET_BOUNDS)
+        for email_date in dates:
+            if email_date:
+                cutoffs = age_cutoffs[email_date.tzinfo is not None]
+                age_counts[last_age_bucket - bisect_left(cutoffs, email_date)] += 1
+        
+        return would_process, excluded_by_filter, category_counts, size_counts, age_counts
     
-    def get_filter_stats(self, emails_metadata: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def get_filter_stats(self, emails_metadata: List[Dict[str, Any]],
+                         workers: Optional[int] = None) -> Dict[str, Any]:
         """
         Generate statistics about filtering results.
         
         Args:
             emails_metadata: List of email metadata to analyze
+            workers: Number of worker processes; None or 1 runs in-process
             
         Returns:
             Dictionary with filtering statistics
@@ -473,52 +751,43 @@ class EmailFilter:
             'total_emails': len(emails_metadata),
             'would_process': 0,
             'excluded_by_filter': {},
-            'categories': {
-                'newsletter': 0,
-                'promotional': 0,
-                'automated': 0,
-                'receipt': 0,
-                'social': 0
-            },
-            'size_distribution': {'small': 0, 'medium': 0, 'large': 0},
-            'age_distribution': {'recent': 0, 'medium': 0, 'old': 0}
+            'categories': dict.fromkeys(_STATS_CATEGORIES, 0),
         }
-        
-        for metadata in emails_metadata:
-            # Check if would be processed
-            result = self.should_process_email(metadata)
-            if result.should_process:
-                stats['would_process'] += 1
+        size_counts = [0] * len(_SIZE_BUCKET_NAMES)
+        age_counts = [0] * len(_AGE_BUCKET_NAMES)
+        
+        # Share one "now" across the batch instead of reading the clock per
+        # email; worker processes receive it with the pickled filter. A
+        # time the caller pinned with begin_batch() is used and kept
+        pinned = self._batch_cutoffs is not None
+        if not pinned:
+            self.begin_batch()
+        try:
+            if workers and workers > 1 and len(emails_metadata) > _STATS_CHUNK_SIZE:
+                chunks = [
+                    emails_metadata[i:i + _STATS_CHUNK_SIZE]
+                    for i in range(0, len(emails_metadata), _STATS_CHUNK_SIZE)
+                ]
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    partials = list(executor.map(self._tally_emails, chunks))
             else:
-                filter_type = result.filter_type
-                stats['excluded_by_filter'][filter_type] = stats['excluded_by_filter'].get(filter_type, 0) + 1
-            
-            # Categorize email
-            categories = self.categorize_email(metadata)
-            for cat_name, is_category in categories.items():
-                if cat_name.startswith('is_') and is_category:
-                    cat_key = cat_name[3:]  # Remove 'is_' prefix
-                    if cat_key in stats['categories']:
-                        stats['categories'][cat_key] += 1
-            
-            # Size distribution
-            size_mb = metadata.get('size_estimate', 0) / (1024 * 1024)
-            if size_mb < 1:
-                stats['size_distribution']['small'] += 1
-            elif size_mb < 10:
-                stats['size_distribution']['medium'] += 1
-            else:
-                stats['size_distribution']['large'] += 1
-            
-            # Age distribution
-            if metadata.get('date'):
-                age_days = (datetime.now() - metadata['date']).days
-                if age_days < 30:
-                    stats['age_distribution']['recent'] += 1
-                elif age_days < 365:
-                    stats['age_distribution']['medium'] += 1
-                else:
-                    stats['age_distribution']['old'] += 1
+                partials = [self._tally_emails(emails_metadata)]
+        finally:
+            if not pinned:
+                self.end_batch()
+        
+        # Merge partial tallies in chunk order
+        for would_process, excluded, categories, sizes, ages in partials:
+            stats['would_process'] += would_process
+            for filter_type, count in excluded.items():
+                stats['excluded_by_filter'][filter_type] = stats['excluded_by_filter'].get(filter_type, 0) + count
+            for cat_key, count in categories.items():
+                stats['categories'][cat_key] += count
+            size_counts = [a + b for a, b in zip(size_counts, sizes)]
+            age_counts = [a + b for a, b in zip(age_counts, ages)]
+        
+        stats['size_distribution'] = dict(zip(_SIZE_BUCKET_NAMES, size_counts))
+        stats['age_distribution'] = dict(zip(_AGE_BUCKET_NAMES, age_counts))
         
         # Calculate percentages
         if stats['total_emails'] > 0:
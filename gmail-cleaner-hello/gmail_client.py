@@ -7,26 +7,219 @@ and provides methods for email operations following Google's best practices.
 
 import os
 import json
+import time
+import queue
+import random
 import logging
-from typing import Dict, List, Optional, Any, Generator
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, List, Optional, Any, Callable, Generator, Iterable
 from pathlib import Path
 from datetime import datetime
 
+import httplib2
+from google.auth.exceptions import RefreshError
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
+from googleapiclient.model import JsonModel
 from email.utils import parsedate_to_datetime
 
 from config import Config
 
+# orjson is optional; googleapiclient's json parsing is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Gmail's batch endpoint accepts at most 100 requests per HTTP call
+_BATCH_LIMIT = 100
+
+# batchDelete and batchModify accept at most 1000 message IDs per call
+_BULK_LIMIT = 1000
+
+# Messages kept in memory per client, keyed by (message ID, format, fields).
+# Only the small formats are cached, so bodies never pile up in memory
+_MESSAGE_CACHE_SIZE = 10000
+_CACHED_FORMATS = ('minimal', 'metadata')
+
+# Formats whose payload never includes MIME parts, so can't show attachments
+_PARTLESS_FORMATS = frozenset(('minimal', 'metadata'))
+
+# Shared stand-in for a missing part body; never modified
+_EMPTY_BODY = {}
+
+# How long get_profile() reuses a fetched profile
+_PROFILE_CACHE_SECONDS = 60
+
+# Errors from rate limiting or transient server trouble; requests failing
+# with these are retried after an exponential backoff
+_RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+_RETRY_REASONS = frozenset(('rateLimitExceeded', 'userRateLimitExceeded', 'backendError'))
+_MAX_BACKOFF_SECONDS = 60
+
+# Errors from a dropped or timed-out connection, retried like the above
+_TRANSPORT_ERRORS = (OSError, httplib2.HttpLib2Error)
+
+
+def is_retryable(status: int, reasons: Iterable[str] = ()) -> bool:
+    """
+    Check whether a failed Gmail API request is worth retrying.
+    
+    Args:
+        status: HTTP status of the failed request
+        reasons: Error reasons from the response body, if any
+    
+    Returns:
+        True for rate-limit and transient server errors
+    """
+    return status in _RETRY_STATUSES or not _RETRY_REASONS.isdisjoint(reasons)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Seconds to wait before retry number attempt + 1, with jitter"""
+    return min(2 ** attempt + random.random(), _MAX_BACKOFF_SECONDS)
+
+
+def _is_retryable(error: HttpError) -> bool:
+    """Check whether a request that failed with an HttpError is worth retrying"""
+    details = getattr(error, 'error_details', None)
+    if not isinstance(details, list):
+        details = ()
+    reasons = [detail.get('reason') for detail in details if isinstance(detail, dict)]
+    return is_retryable(error.resp.status, reasons)
+
+
+# Headers read by extract_message_metadata(), lowercased
+_WANTED_HEADERS = frozenset(('subject', 'from', 'to', 'date', 'message-id'))
+
+
+@lru_cache(maxsize=65536)
+def _parse_date(date_str: str) -> Optional[datetime]:
+    """
+    Parse an RFC 2822 Date header, memoized since bulk mail repeats them.
+    
+    Args:
+        date_str: Date header value
+    
+    Returns:
+        Parsed datetime, or None if the header is malformed
+    """
+    try:
+        return parsedate_to_datetime(date_str)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+@lru_cache(maxsize=None)
+def _gmail_discovery_document() -> Optional[Dict[str, Any]]:
+    """
+    Parse the Gmail v1 discovery document bundled with googleapiclient.
+    
+    build() parses the same document on every call; parsing it once lets
+    each further client skip that work.
+    
+    Returns:
+        Parsed discovery document, or None if the library doesn't bundle one
+    """
+    document = get_static_doc('gmail', 'v1')
+    if document is None:
+        return None
+    return orjson.loads(document) if orjson is not None else json.loads(document)
+
+
+@lru_cache(maxsize=32)
+def _load_token(token_file: str, mtime_ns: int, scopes: tuple) -> Credentials:
+    """
+    Load saved credentials, once per version of the token file.
+    
+    Args:
+        token_file: Path of the token file
+        mtime_ns: Modification time of the file, so a rewritten token is reloaded
+        scopes: OAuth2 scopes the token must grant
+    
+    Returns:
+        Credentials shared by every caller loading the same file version
+    """
+    return Credentials.from_authorized_user_file(token_file, list(scopes))
+
+
+def _parts_fields(depth: int) -> str:
+    """Partial-response mask for MIME parts, nested depth levels deep"""
+    # Below the last level whole parts are returned, so deeper
+    # attachments are still found
+    nested = _parts_fields(depth - 1) if depth > 1 else 'parts'
+    return f"parts(filename,body/attachmentId,{nested})"
+
+
+class _OrjsonModel(JsonModel):
+    """JsonModel that parses response bodies with orjson"""
+    
+    def deserialize(self, content):
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # Leave anything orjson rejects to the stock parser
+            return super().deserialize(content)
+
+
+# Partial-response masks for the fields parameter. METADATA_FIELDS holds
+# everything extract_message_metadata() reads; LIST_ID_FIELDS makes
+# search_messages() return bare IDs
+METADATA_FIELDS = f"id,threadId,labelIds,sizeEstimate,payload(headers,{_parts_fields(4)})"
+LIST_ID_FIELDS = 'messages/id,nextPageToken'
+
 
 class GmailAPIError(Exception):
     """Custom exception for Gmail API related errors"""
     pass
 
 
+@dataclass(slots=True)
+class MessageMeta:
+    """Metadata of one message, as extracted by extract_message_meta()"""
+    id: Optional[str]
+    thread_id: Optional[str]
+    label_ids: list
+    size_estimate: int
+    subject: str
+    sender: str
+    to: str
+    date_str: str
+    message_id_header: str
+    date: Optional[datetime]
+    has_attachments: bool
+    attachment_count: int
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the dictionary returned by extract_message_metadata()"""
+        return {
+            'id': self.id,
+            'thread_id': self.thread_id,
+            'label_ids': self.label_ids,
+            'size_estimate': self.size_estimate,
+            'subject': self.subject,
+            'from': self.sender,
+            'to': self.to,
+            'date_str': self.date_str,
+            'message_id_header': self.message_id_header,
+            'date': self.date,
+            'has_attachments': self.has_attachments,
+            'attachment_count': self.attachment_count,
+        }
+
+
 class GmailClient:
     """
     Gmail API client that handles authentication and email operations.
@@ -40,20 +233,67 @@ class GmailClient:
     - Rate limiting and error handling
     """
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, credentials: Optional[Credentials] = None):
         """
         Initialize Gmail client with configuration.
         
         Args:
             config: Application configuration object
+            credentials: Credentials to use as they are, skipping the token
+                file and OAuth2 flow
         """
         self.config = config
         self.service = None
         self.credentials = None
         self.logger = logging.getLogger(__name__)
         
+        # Recently fetched messages, least recently used first, the field
+        # masks they were fetched with, and the last profile with the time
+        # it was fetched
+        self._message_cache = OrderedDict()
+        self._cached_fields = {None}
+        self._profile_cache = None
+        
+        # httplib2 connections can't be shared between threads, so each
+        # thread sending batch requests gets its own. The worker threads
+        # outlive a single call so their keep-alive connections are reused
+        self._http_local = threading.local()
+        self._executor = None
+        
         # Initialize authentication
-        self._authenticate()
+        if credentials is None:
+            self._authenticate()
+        else:
+            self._build_service(credentials)
+    
+    @classmethod
+    def from_token_file(cls, config: Config, token_file: Optional[str] = None) -> 'GmailClient':
+        """
+        Create a client from a saved token without the OAuth2 flow.
+        
+        Clients created from the same unchanged token file share one
+        Credentials object, so a token refreshed by one serves them all.
+        
+        Args:
+            config: Application configuration object
+            token_file: Token file to load; defaults to config.auth.token_file
+        
+        Returns:
+            Client using the saved token
+        
+        Raises:
+            GmailAPIError: If the token file can't be loaded
+        """
+        token_path = Path(token_file or config.auth.token_file)
+        try:
+            creds = _load_token(
+                str(token_path),
+                token_path.stat().st_mtime_ns,
+                tuple(config.auth.scopes)
+            )
+        except Exception as e:
+            raise GmailAPIError(f"Failed to load token file {token_path}: {e}")
+        return cls(config, credentials=creds)
     
     def _authenticate(self) -> None:
         """
@@ -63,20 +303,22 @@ class GmailClient:
         1. Checks for existing valid tokens
         2. Refreshes expired tokens if possible
         3. Runs OAuth flow for new authentication
-        4. Saves tokens for future use
+        4. Saves new or refreshed tokens for future use
         
         Raises:
             GmailAPIError: If authentication fails
         """
         creds = None
+        token_changed = False
         token_path = Path(self.config.auth.token_file)
         
         # Load existing token if available
         if token_path.exists():
             try:
-                creds = Credentials.from_authorized_user_file(
-                    self.config.auth.token_file, 
-                    self.config.auth.scopes
+                creds = _load_token(
+                    str(token_path),
+                    token_path.stat().st_mtime_ns,
+                    tuple(self.config.auth.scopes)
                 )
                 self.logger.info("Loaded existing authentication token")
             except Exception as e:
@@ -86,6 +328,7 @@ class GmailClient:
         if creds and creds.expired and creds.refresh_token:
             try:
                 creds.refresh(Request())
+                token_changed = True
                 self.logger.info("Refreshed expired authentication token")
             except Exception as e:
                 self.logger.warning(f"Failed to refresh token: {e}")
@@ -106,21 +349,49 @@ class GmailClient:
                     self.config.auth.scopes
                 )
                 creds = flow.run_local_server(port=0)
+                token_changed = True
                 self.logger.info("Completed OAuth2 authentication flow")
             except Exception as e:
                 raise GmailAPIError(f"OAuth2 authentication failed: {e}")
         
-        # Save credentials for next run
-        try:
-            with open(self.config.auth.token_file, 'w') as token:
-                token.write(creds.to_json())
-            self.logger.info("Saved authentication token")
-        except Exception as e:
-            self.logger.warning(f"Failed to save token: {e}")
+        # Save credentials for next run if they changed; the token is
+        # written to a temporary file and renamed into place so a crash
+        # mid-write can't leave a corrupt token behind. The file is created
+        # readable by the owner only, as it holds the refresh token
+        if token_changed:
+            tmp_path = token_path.with_name(token_path.name + '.tmp')
+            try:
+                tmp_path.unlink(missing_ok=True)
+                fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                with os.fdopen(fd, 'w') as token:
+                    token.write(creds.to_json())
+                os.replace(tmp_path, token_path)
+                self.logger.info("Saved authentication token")
+            except Exception as e:
+                tmp_path.unlink(missing_ok=True)
+                self.logger.warning(f"Failed to save token: {e}")
         
-        # Build Gmail service
+        self._build_service(creds)
+    
+    def _build_service(self, creds: Credentials) -> None:
+        """
+        Build the Gmail API service around authenticated credentials.
+        
+        Args:
+            creds: Credentials to authorize requests with
+        
+        Raises:
+            GmailAPIError: If the service can't be built
+        """
         try:
-            self.service = build('gmail', 'v1', credentials=creds)
+            # The bundled discovery document is parsed once and shared by
+            # every client in the process
+            model = _OrjsonModel() if orjson is not None else None
+            document = _gmail_discovery_document()
+            if document is not None:
+                self.service = build_from_document(document, credentials=creds, model=model)
+            else:
+                self.service = build('gmail', 'v1', credentials=creds, model=model)
             self.credentials = creds
             self.logger.info("Successfully initialized Gmail API client")
         except Exception as e:
@@ -130,26 +401,44 @@ class GmailClient:
         """
         Get Gmail profile information.
         
+        The profile is reused for up to a minute, so repeated storage
+        checks don't each make an API call.
+        
         Returns:
             Dict containing profile information including email address and storage usage
             
         Raises:
             GmailAPIError: If API call fails
         """
+        now = time.monotonic()
+        cached = self._profile_cache
+        if cached and now - cached[1] < _PROFILE_CACHE_SECONDS:
+            return cached[0]
+        
         try:
             profile = self.service.users().getProfile(userId='me').execute()
             self.logger.info(f"Retrieved profile for: {profile.get('emailAddress')}")
+            self._profile_cache = (profile, now)
             return profile
         except HttpError as e:
             raise GmailAPIError(f"Failed to get profile: {e}")
     
-    def search_messages(self, query: str, max_results: Optional[int] = None) -> List[Dict[str, Any]]:
+    def search_messages(self, query: str, max_results: Optional[int] = None,
+                        fields: Optional[str] = None,
+                        label_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Search for messages using Gmail search query syntax.
         
+        Collects iter_messages() into a list; use that directly to handle
+        large result sets without holding them all in memory.
+        
         Args:
             query: Gmail search query (e.g., "older_than:1y")
             max_results: Maximum number of messages to return
+            fields: Partial-response mask, e.g. LIST_ID_FIELDS; must
+                include nextPageToken for results past the first page
+            label_ids: Only return messages with all of these label IDs;
+                filtered server-side, faster than label: terms in query
             
         Returns:
             List of message dictionaries with id and threadId
@@ -157,107 +446,294 @@ class GmailClient:
         Raises:
             GmailAPIError: If search fails
         """
-        try:
-            messages = []
-            page_token = None
-            
-            while True:
-                # Execute search request
-                request = self.service.users().messages().list(
+        messages = list(self.iter_messages(query, max_results, fields, label_ids))
+        self.logger.info(f"Found {len(messages)} messages for query: {query}")
+        return messages
+    
+    def iter_messages(self, query: str, max_results: Optional[int] = None,
+                      fields: Optional[str] = None,
+                      label_ids: Optional[List[str]] = None) -> Generator[Dict[str, Any], None, None]:
+        """
+        Yield messages matching a Gmail search query, one page at a time.
+        
+        Each page is requested only once the previous one has been
+        consumed, so memory use doesn't grow with the number of results.
+        
+        Args:
+            query: Gmail search query (e.g., "older_than:1y")
+            max_results: Maximum number of messages to yield
+            fields: Partial-response mask, e.g. LIST_ID_FIELDS; must
+                include nextPageToken for results past the first page
+            label_ids: Only yield messages with all of these label IDs
+        
+        Yields:
+            Message dictionaries with id and threadId
+        
+        Raises:
+            GmailAPIError: If search fails
+        """
+        remaining = max_results or None
+        page_token = None
+        
+        while True:
+            # Execute search request, asking for no more than still needed.
+            # The calling thread's own connection is used, as
+            # iter_with_details() searches from a background thread
+            try:
+                response = self.service.users().messages().list(
                     userId='me',
                     q=query,
+                    labelIds=label_ids,
                     pageToken=page_token,
-                    maxResults=min(500, max_results) if max_results else 500
-                )
-                
-                response = request.execute()
-                
-                # Add messages from this page
-                if 'messages' in response:
-                    messages.extend(response['messages'])
-                    
-                    # Check if we've reached max_results
-                    if max_results and len(messages) >= max_results:
-                        messages = messages[:max_results]
-                        break
-                
-                # Check for more pages
-                page_token = response.get('nextPageToken')
-                if not page_token:
-                    break
+                    maxResults=min(500, remaining) if remaining else 500,
+                    fields=fields
+                ).execute(http=self._thread_http(), num_retries=self.config.safety.max_retries)
+            except HttpError as e:
+                raise GmailAPIError(f"Message search failed: {e}")
             
-            self.logger.info(f"Found {len(messages)} messages for query: {query}")
-            return messages
+            # Yield messages from this page, stopping at max_results
+            page = response.get('messages', ())
+            if remaining is not None:
+                page = page[:remaining]
+                remaining -= len(page)
+            yield from page
             
-        except HttpError as e:
-            raise GmailAPIError(f"Message search failed: {e}")
+            # Check for more pages
+            page_token = response.get('nextPageToken')
+            if not page_token or remaining == 0:
+                break
     
-    def get_message(self, message_id: str, format: str = 'full') -> Dict[str, Any]:
+    def get_message(self, message_id: str, format: str = 'full',
+                    fields: Optional[str] = None) -> Dict[str, Any]:
         """
         Get a specific message by ID.
         
+        'metadata' and 'minimal' messages are cached per client, so asking
+        again for one doesn't make another API call. Cached messages are
+        shared between callers and must not be modified.
+        
         Args:
             message_id: Gmail message ID
             format: Message format ('minimal', 'full', 'raw', 'metadata')
-            
+            fields: Partial-response mask, e.g. METADATA_FIELDS; None
+                returns the whole message
+        
         Returns:
             Message dictionary with headers, body, and attachments
             
         Raises:
             GmailAPIError: If message retrieval fails
         """
+        key = (message_id, format, fields)
+        message = self._message_cache.get(key)
+        if message is not None:
+            self._message_cache.move_to_end(key)
+            return message
+        
         try:
             message = self.service.users().messages().get(
                 userId='me',
                 id=message_id,
-                format=format
-            ).execute()
+                format=format,
+                fields=fields
+            ).execute(num_retries=self.config.safety.max_retries)
             
+            self._cache_message(key, message)
             return message
             
         except HttpError as e:
             raise GmailAPIError(f"Failed to get message {message_id}: {e}")
     
-    def get_messages_batch(self, message_ids: List[str], format: str = 'full') -> List[Dict[str, Any]]:
+    def get_messages_batch(self, message_ids: Iterable[str], format: str = 'full',
+                           fields: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get multiple messages efficiently using batch requests.
         
+        IDs are consumed 100 at a time, so they can come straight from a
+        generator such as iter_messages().
+        
         Args:
-            message_ids: List of Gmail message IDs
+            message_ids: Gmail message IDs
             format: Message format for all messages
-            
+            fields: Partial-response mask for all messages
+        
         Returns:
             List of message dictionaries
-            
+        
         Raises:
             GmailAPIError: If batch request fails
         """
-        if not message_ids:
-            return []
-        
         messages = []
+        ids = iter(message_ids)
+        window_size = _BATCH_LIMIT * max(1, self.config.safety.max_workers)
         
-        # Process in batches of 100 (Gmail API limit)
-        batch_size = 100
-        for i in range(0, len(message_ids), batch_size):
-            batch_ids = message_ids[i:i + batch_size]
+        while True:
+            window_ids = list(islice(ids, window_size))
+            if not window_ids:
+                break
             
-            try:
-                batch_messages = []
-                for msg_id in batch_ids:
-                    message = self.get_message(msg_id, format)
-                    batch_messages.append(message)
+            # Only messages not already cached are requested
+            messages_by_id = {}
+            missing_ids = []
+            for msg_id in dict.fromkeys(window_ids):
+                message = self._message_cache.get((msg_id, format, fields))
+                if message is None:
+                    missing_ids.append(msg_id)
+                else:
+                    messages_by_id[msg_id] = message
+            
+            # The rest go out as batch HTTP requests, sent concurrently
+            chunks = [
+                missing_ids[i:i + _BATCH_LIMIT]
+                for i in range(0, len(missing_ids), _BATCH_LIMIT)
+            ]
+            outcomes = self._execute_batches([
+                [
+                    self.service.users().messages().get(
+                        userId='me', id=msg_id, format=format, fields=fields
+                    )
+                    for msg_id in batch_ids
+                ]
+                for batch_ids in chunks
+            ])
+            
+            for batch_ids, (results, batch_error) in zip(chunks, outcomes):
+                if batch_error is not None:
+                    self.logger.error(f"Batch request failed for IDs {batch_ids}: {batch_error}")
+                    raise GmailAPIError(f"Batch message retrieval failed: {batch_error}")
                 
-                messages.extend(batch_messages)
-                self.logger.debug(f"Retrieved batch of {len(batch_messages)} messages")
+                for msg_id, (message, error) in zip(batch_ids, results):
+                    if error is not None:
+                        self.logger.error(f"Batch request failed for ID {msg_id}: {error}")
+                        raise GmailAPIError(f"Failed to get message {msg_id}: {error}")
+                    messages_by_id[msg_id] = message
+                    self._cache_message((msg_id, format, fields), message)
                 
-            except Exception as e:
-                self.logger.error(f"Batch request failed for IDs {batch_ids}: {e}")
-                raise GmailAPIError(f"Batch message retrieval failed: {e}")
+                self.logger.debug(f"Retrieved batch of {len(batch_ids)} messages")
+            
+            messages.extend(messages_by_id[msg_id] for msg_id in window_ids)
         
         self.logger.info(f"Retrieved {len(messages)} messages in total")
         return messages
     
+    def iter_with_details(self, query: str, format: str = 'metadata',
+                          max_results: Optional[int] = None, fields: Optional[str] = None,
+                          max_inflight: int = 4) -> Generator[Dict[str, Any], None, None]:
+        """
+        Yield the messages matching a search query, fetched in the given format.
+        
+        The search runs in a background thread that queues message IDs
+        100 at a time, so later result pages are requested while earlier
+        messages are still being fetched.
+        
+        Args:
+            query: Gmail search query (e.g., "older_than:1y")
+            format: Message format for the fetched messages
+            max_results: Maximum number of messages to yield
+            fields: Partial-response mask for the fetched messages
+            max_inflight: Chunks of IDs the search may queue ahead
+        
+        Yields:
+            Message dictionaries, in search order
+        
+        Raises:
+            GmailAPIError: If search or retrieval fails
+        """
+        # Holds lists of IDs, then None once the search is done, or the
+        # exception the search failed with
+        chunks = queue.Queue(maxsize=max(1, max_inflight))
+        stop = threading.Event()
+        
+        def search():
+            try:
+                ids = (message['id'] for message in self.iter_messages(query, max_results, LIST_ID_FIELDS))
+                while not stop.is_set():
+                    chunk = list(islice(ids, _BATCH_LIMIT))
+                    chunks.put(chunk or None)
+                    if not chunk:
+                        break
+            except Exception as e:
+                chunks.put(e)
+        
+        searcher = threading.Thread(target=search, name='gmail-search', daemon=True)
+        searcher.start()
+        window_size = _BATCH_LIMIT * max(1, self.config.safety.max_workers)
+        
+        try:
+            done = False
+            while not done:
+                # Wait for a chunk, then take any others already queued so
+                # every batch worker has something to fetch
+                window_ids = []
+                chunk = chunks.get()
+                while True:
+                    if chunk is None:
+                        done = True
+                        break
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    window_ids.extend(chunk)
+                    if len(window_ids) >= window_size:
+                        break
+                    try:
+                        chunk = chunks.get_nowait()
+                    except queue.Empty:
+                        break
+                
+                if window_ids:
+                    yield from self.get_messages_batch(window_ids, format, fields)
+        finally:
+            # Let the search thread finish a blocked put and see the stop
+            # flag if the caller stopped early
+            stop.set()
+            try:
+                while True:
+                    chunks.get_nowait()
+            except queue.Empty:
+                pass
+    
+    def scan_for_deletion(self, query: str, predicate: Callable[[MessageMeta], bool],
+                          max_results: Optional[int] = None) -> List[str]:
+        """
+        Pick messages matching a search query for deletion.
+        
+        Messages are fetched in 'metadata' format and judged on their
+        MessageMeta alone, so no message body is downloaded; fetch the
+        chosen ones with get_messages_batch() if their content is needed.
+        This is the preferred way to select messages for size- or
+        age-based cleanup.
+        
+        Args:
+            query: Gmail search query (e.g., "older_than:1y larger:5M")
+            predicate: Returns True for each message to delete
+            max_results: Maximum number of messages to examine
+        
+        Returns:
+            IDs of the messages picked, in search order
+        
+        Raises:
+            GmailAPIError: If search or retrieval fails
+        """
+        ids = (message['id'] for message in self.iter_messages(query, max_results, LIST_ID_FIELDS))
+        window_size = _BATCH_LIMIT * max(1, self.config.safety.max_workers)
+        picked = []
+        
+        # Metadata is fetched a window at a time, so only one window of
+        # messages is held at once
+        while True:
+            window_ids = list(islice(ids, window_size))
+            if not window_ids:
+                break
+            
+            for message in self.get_messages_batch(window_ids, format='metadata',
+                                                   fields=METADATA_FIELDS):
+                meta = self.extract_message_meta(message, format='metadata')
+                if predicate(meta):
+                    picked.append(meta.id)
+        
+        self.logger.info(f"Picked {len(picked)} messages for deletion from query: {query}")
+        return picked
+    
     def delete_message(self, message_id: str, permanent: bool = False) -> bool:
         """
         Delete a message (move to trash or permanently delete).
@@ -272,22 +748,25 @@ class GmailClient:
         Raises:
             GmailAPIError: If deletion fails
         """
+        # Rate-limit and server errors are retried with backoff by execute()
+        max_retries = self.config.safety.max_retries
         try:
             if permanent:
                 # Permanently delete the message
                 self.service.users().messages().delete(
                     userId='me',
                     id=message_id
-                ).execute()
+                ).execute(num_retries=max_retries)
                 self.logger.debug(f"Permanently deleted message: {message_id}")
             else:
                 # Move to trash
                 self.service.users().messages().trash(
                     userId='me',
                     id=message_id
-                ).execute()
+                ).execute(num_retries=max_retries)
                 self.logger.debug(f"Moved to trash: {message_id}")
             
+            self._forget_message(message_id)
             return True
             
         except HttpError as e:
@@ -299,6 +778,11 @@ class GmailClient:
         """
         Delete multiple messages efficiently.
         
+        Up to 1000 messages at a time are deleted with one batchDelete
+        call, or moved to trash with one batchModify call. If such a call
+        fails even after retries, those messages are deleted one by one
+        instead, so each still succeeds or fails on its own.
+        
         Args:
             message_ids: List of message IDs to delete
             permanent: If True, permanently delete; if False, move to trash
@@ -315,14 +799,36 @@ class GmailClient:
         success_ids = []
         failed_ids = []
         
-        # Process deletions individually to handle partial failures
-        for message_id in message_ids:
+        messages = self.service.users().messages()
+        max_retries = self.config.safety.max_retries
+        
+        for i in range(0, len(message_ids), _BULK_LIMIT):
+            bulk_ids = message_ids[i:i + _BULK_LIMIT]
+            
             try:
-                self.delete_message(message_id, permanent)
-                success_ids.append(message_id)
-            except GmailAPIError:
-                failed_ids.append(message_id)
+                if permanent:
+                    messages.batchDelete(
+                        userId='me',
+                        body={'ids': bulk_ids}
+                    ).execute(num_retries=max_retries)
+                else:
+                    messages.batchModify(
+                        userId='me',
+                        body={'ids': bulk_ids, 'addLabelIds': ['TRASH'], 'removeLabelIds': ['INBOX']}
+                    ).execute(num_retries=max_retries)
+            except (HttpError, *_TRANSPORT_ERRORS) as e:
+                self.logger.warning(
+                    f"Bulk deletion of {len(bulk_ids)} messages failed, "
+                    f"deleting them one by one: {e}"
+                )
+                succeeded, failed = self._delete_individually(bulk_ids, permanent)
+                success_ids.extend(succeeded)
+                failed_ids.extend(failed)
                 continue
+            
+            success_ids.extend(bulk_ids)
+            for message_id in bulk_ids:
+                self._forget_message(message_id)
         
         self.logger.info(
             f"Batch deletion completed: {len(success_ids)} successful, "
@@ -331,96 +837,254 @@ class GmailClient:
         
         return {'success': success_ids, 'failed': failed_ids}
     
-    def extract_message_metadata(self, message: Dict[str, Any]) -> Dict[str, Any]:
+    def _delete_individually(self, message_ids: List[str], permanent: bool) -> tuple:
         """
-        Extract useful metadata from a Gmail message object.
+        Delete messages with one batched request per message.
         
         Args:
-            message: Gmail message dictionary
+            message_ids: List of message IDs to delete
+            permanent: If True, permanently delete; if False, move to trash
+        
+        Returns:
+            Tuple of (deleted message IDs, failed message IDs)
+        """
+        success_ids = []
+        failed_ids = []
+        
+        messages = self.service.users().messages()
+        action = messages.delete if permanent else messages.trash
+        
+        # Batched deletions, sent concurrently, still report success or
+        # failure per message
+        chunks = [
+            message_ids[i:i + _BATCH_LIMIT]
+            for i in range(0, len(message_ids), _BATCH_LIMIT)
+        ]
+        outcomes = self._execute_batches([
+            [action(userId='me', id=message_id) for message_id in batch_ids]
+            for batch_ids in chunks
+        ])
+        
+        for batch_ids, (results, batch_error) in zip(chunks, outcomes):
+            if batch_error is not None:
+                self.logger.error(f"Batch deletion failed for IDs {batch_ids}: {batch_error}")
+                failed_ids.extend(batch_ids)
+                continue
             
+            for message_id, (_, error) in zip(batch_ids, results):
+                if error is None:
+                    success_ids.append(message_id)
+                    self._forget_message(message_id)
+                else:
+                    self.logger.error(f"Failed to delete message {message_id}: {error}")
+                    failed_ids.append(message_id)
+        
+        return success_ids, failed_ids
+    
+    def _cache_message(self, key: tuple, message: Dict[str, Any]) -> None:
+        """Remember a fetched message, evicting the least recently used"""
+        if key[1] not in _CACHED_FORMATS:
+            return
+        self._cached_fields.add(key[2])
+        cache = self._message_cache
+        cache[key] = message
+        cache.move_to_end(key)
+        if len(cache) > _MESSAGE_CACHE_SIZE:
+            cache.popitem(last=False)
+    
+    def _forget_message(self, message_id: str) -> None:
+        """Drop a deleted message from the caches"""
+        for format in _CACHED_FORMATS:
+            for fields in self._cached_fields:
+                self._message_cache.pop((message_id, format, fields), None)
+        # Message counts in the profile are now stale
+        self._profile_cache = None
+    
+    def _execute_batch(self, requests: List[Any]) -> List[tuple]:
+        """
+        Send up to _BATCH_LIMIT API requests in a single HTTP round trip.
+        
+        Requests that fail with a rate-limit or server error are sent
+        again in a smaller batch after a backoff, up to safety.max_retries
+        times; their last error is reported if they never succeed. A batch
+        lost to a connection error is retried the same way.
+        
+        Args:
+            requests: Unexecuted googleapiclient requests
+        
         Returns:
-            Dictionary with extracted metadata (date, from, subject, size, etc.)
+            (response, exception) for each request, in request order
+        
+        Raises:
+            HttpError: If the batch request itself fails
+            GmailAPIError: If the batch can't be sent or credentials
+                can't be refreshed
         """
-        metadata = {
-            'id': message.get('id'),
-            'thread_id': message.get('threadId'),
-            'label_ids': message.get('labelIds', []),
-            'size_estimate': message.get('sizeEstimate', 0),
-        }
+        results = [None] * len(requests)
         
-        # Extract headers
-        headers = {}
-        payload = message.get('payload', {})
-        for header in payload.get('headers', []):
-            headers[header['name'].lower()] = header['value']
-        
-        # Common header fields
-        metadata.update({
-            'subject': headers.get('subject', ''),
-            'from': headers.get('from', ''),
-            'to': headers.get('to', ''),
-            'date_str': headers.get('date', ''),
-            'message_id_header': headers.get('message-id', ''),
-        })
-        
-        # Parse date
-        try:
-            if metadata['date_str']:
-                metadata['date'] = parsedate_to_datetime(metadata['date_str'])
-            else:
-                metadata['date'] = None
-        except Exception:
-            metadata['date'] = None
+        def on_response(request_id, response, exception):
+            results[int(request_id)] = (response, exception)
+        
+        max_retries = self.config.safety.max_retries
+        pending = range(len(requests))
         
-        # Check for attachments
-        metadata['has_attachments'] = self._has_attachments(payload)
-        metadata['attachment_count'] = self._count_attachments(payload)
+        for attempt in range(max_retries + 1):
+            if attempt:
+                self.logger.debug(f"Retrying {len(pending)} batched requests")
+                time.sleep(backoff_delay(attempt - 1))
+            
+            # Positions are used as request IDs so repeated message IDs are fine
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for index in pending:
+                batch.add(requests[index], request_id=str(index))
+            try:
+                batch.execute(http=self._thread_http())
+            except HttpError as e:
+                if attempt == max_retries or not _is_retryable(e):
+                    raise
+                continue
+            except _TRANSPORT_ERRORS as e:
+                if attempt == max_retries:
+                    raise GmailAPIError(f"Batch request failed: {e}")
+                continue
+            except RefreshError as e:
+                raise GmailAPIError(f"Failed to refresh credentials: {e}")
+            
+            pending = [
+                index for index in pending
+                if results[index][1] is not None and _is_retryable(results[index][1])
+            ]
+            if not pending:
+                break
         
-        return metadata
+        return results
     
-    def _has_attachments(self, payload: Dict[str, Any]) -> bool:
+    def _execute_batches(self, request_batches: List[List[Any]]) -> List[tuple]:
         """
-        Check if message has attachments.
+        Send several batch requests, up to safety.max_workers at a time.
         
         Args:
-            payload: Message payload from Gmail API
+            request_batches: Lists of at most _BATCH_LIMIT requests each
+        
+        Returns:
+            (results, error) for each batch, in order; results is as from
+            _execute_batch, or None if the batch request raised error
+        """
+        def run(requests):
+            try:
+                return self._execute_batch(requests), None
+            except (HttpError, GmailAPIError) as e:
+                return None, e
+        
+        if self.config.safety.max_workers <= 1 or len(request_batches) <= 1:
+            return [run(requests) for requests in request_batches]
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.config.safety.max_workers,
+                thread_name_prefix='gmail-batch'
+            )
+        return list(self._executor.map(run, request_batches))
+    
+    def close(self) -> None:
+        """Stop the batch worker threads and drop their connections"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self._http_local = threading.local()
+    
+    def _thread_http(self) -> AuthorizedHttp:
+        """Return the calling thread's authorized HTTP connection"""
+        http = getattr(self._http_local, 'http', None)
+        if http is None:
+            http = self._http_local.http = AuthorizedHttp(self.credentials, http=build_http())
+        return http
+    
+    def extract_message_metadata(self, message: Dict[str, Any],
+                                 format: str = 'full') -> Dict[str, Any]:
+        """
+        Extract useful metadata from a Gmail message object.
+        
+        Args:
+            message: Gmail message dictionary
+            format: Format the message was fetched in
             
         Returns:
-            True if message has attachments
+            Dictionary with extracted metadata (date, from, subject, size, etc.)
+        """
+        return self.extract_message_meta(message, format).to_dict()
+    
+    def extract_message_meta(self, message: Dict[str, Any],
+                             format: str = 'full') -> MessageMeta:
         """
-        parts = payload.get('parts', [])
-        if not parts:
-            return False
+        Extract useful metadata from a Gmail message object.
+        
+        Takes about a third of the memory of extract_message_metadata()'s
+        dictionary, for callers holding the metadata of many messages.
+        
+        Args:
+            message: Gmail message dictionary
+            format: Format the message was fetched in; attachments are only
+                looked for in formats that return MIME parts
+            
+        Returns:
+            MessageMeta with extracted metadata
+        """
+        # Extract the wanted headers, scanning from the end so the last
+        # occurrence of a repeated header wins, and stopping once all
+        # have been seen
+        headers = {}
+        payload = message.get('payload', {})
+        for header in reversed(payload.get('headers') or ()):
+            name = header['name'].lower()
+            if name in _WANTED_HEADERS and name not in headers:
+                headers[name] = header['value']
+                if len(headers) == len(_WANTED_HEADERS):
+                    break
         
-        for part in parts:
-            if part.get('filename') and part.get('body', {}).get('attachmentId'):
-                return True
-            # Check nested parts
-            if self._has_attachments(part):
-                return True
+        date_str = headers.get('date', '')
+        if format in _PARTLESS_FORMATS:
+            has_attachments, attachment_count = False, 0
+        else:
+            has_attachments, attachment_count = self._scan_attachments(payload)
         
-        return False
+        return MessageMeta(
+            id=message.get('id'),
+            thread_id=message.get('threadId'),
+            label_ids=message.get('labelIds', []),
+            size_estimate=message.get('sizeEstimate', 0),
+            subject=headers.get('subject', ''),
+            sender=headers.get('from', ''),
+            to=headers.get('to', ''),
+            date_str=date_str,
+            message_id_header=headers.get('message-id', ''),
+            date=_parse_date(date_str) if date_str else None,
+            has_attachments=has_attachments,
+            attachment_count=attachment_count,
+        )
     
-    def _count_attachments(self, payload: Dict[str, Any]) -> int:
+    def _scan_attachments(self, payload: Dict[str, Any]) -> tuple:
         """
-        Count number of attachments in message.
+        Find attachments in a message with one walk of its MIME parts.
         
         Args:
             payload: Message payload from Gmail API
-            
+        
         Returns:
-            Number of attachments
+            Tuple of (has attachments, number of attachments)
         """
         count = 0
-        parts = payload.get('parts', [])
+        stack = [payload]
         
-        for part in parts:
-            if part.get('filename') and part.get('body', {}).get('attachmentId'):
-                count += 1
-            # Count nested parts
-            count += self._count_attachments(part)
+        while stack:
+            for part in stack.pop().get('parts') or ():
+                if part.get('filename') and (part.get('body') or _EMPTY_BODY).get('attachmentId'):
+                    count += 1
+                # Check nested parts
+                if part.get('parts'):
+                    stack.append(part)
         
-        return count
+        return count > 0, count
     
     def get_storage_usage(self) -> Dict[str, int]:
         """
@@ -475,8 +1139,8 @@ if __name__ == "__main__":
         
         # Get metadata for first message
         if messages:
-            first_msg = client.get_message(messages[0]['id'], format='metadata')
-            metadata = client.extract_message_metadata(first_msg)
+            first_msg = client.get_message(messages[0]['id'], format='metadata', fields=METADATA_FIELDS)
+            metadata = client.extract_message_metadata(first_msg, format='metadata')
             print(f"\nFirst message metadata:")
             print(f"  Subject: {metadata['subject'][:50]}...")
             print(f"  From: {metadata['from'][:50]}...")
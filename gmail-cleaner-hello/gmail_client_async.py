@@ -0,0 +1,303 @@
+"""
+Async Gmail API access for Gmail Storage Manager
+
+This module overlaps many Gmail API reads on a single asyncio event loop,
+for bulk jobs where per-request latency dominates. It reuses the
+credentials of an authenticated GmailClient and calls the Gmail REST
+endpoints directly, so no extra HTTP library is needed.
+"""
+
+import json
+import time
+import asyncio
+import logging
+import threading
+import http.client
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any
+
+from google.auth.exceptions import RefreshError
+from google.auth.transport.requests import Request
+
+from gmail_client import GmailClient, GmailAPIError, is_retryable, backoff_delay
+
+
+# Gmail REST endpoint for the authenticated user
+_API_ROOT = 'https://gmail.googleapis.com/gmail/v1/users/me'
+
+# Requests allowed in flight at once by default
+_DEFAULT_CONCURRENCY = 32
+
+
+def _is_retryable(error: urllib.error.HTTPError) -> bool:
+    """Check whether a request that failed with an HTTPError is worth retrying"""
+    # Rate limits can also come back as 403 with a reason in the body
+    try:
+        details = json.loads(error.read())['error']['errors']
+        reasons = [detail.get('reason') for detail in details if isinstance(detail, dict)]
+    except (OSError, ValueError, KeyError, TypeError):
+        reasons = ()
+    return is_retryable(error.code, reasons)
+
+
+class AsyncGmailClient:
+    """
+    Concurrent Gmail reads built on asyncio.
+    
+    Each request runs a blocking urllib call on a pool of `concurrency`
+    threads owned by this client and opens its own connection, so up to
+    `concurrency` round trips overlap without sharing the googleapiclient
+    transport between threads. Rate-limit and server errors are retried
+    with backoff like GmailClient's, and the access token is refreshed
+    whenever it expires during a run.
+    """
+    
+    def __init__(self, client: GmailClient, concurrency: int = _DEFAULT_CONCURRENCY):
+        """
+        Initialize async access on top of an authenticated client.
+        
+        Args:
+            client: Authenticated Gmail client providing credentials
+            concurrency: Maximum number of requests in flight
+        """
+        self.client = client
+        self.concurrency = concurrency
+        self.logger = logging.getLogger(__name__)
+        
+        # The default executor is capped by CPU count, so requests get a
+        # pool sized to the concurrency asked for
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='gmail-async')
+        self._token_lock = threading.Lock()
+    
+    def close(self) -> None:
+        """Stop the request threads"""
+        self._executor.shutdown()
+    
+    def _refresh_token(self, stale_token: Optional[str]) -> Optional[str]:
+        """
+        Refresh the access token unless another thread already has.
+        
+        Args:
+            stale_token: Token the caller found expired or rejected
+        
+        Returns:
+            Current access token
+        
+        Raises:
+            GmailAPIError: If the token can't be refreshed
+        """
+        with self._token_lock:
+            creds = self.client.credentials
+            if creds.token == stale_token:
+                try:
+                    creds.refresh(Request())
+                except RefreshError as e:
+                    raise GmailAPIError(f"Failed to refresh token: {e}")
+                self.logger.info("Refreshed expired authentication token")
+            return creds.token
+    
+    def _fetch_json(self, url: str) -> Dict[str, Any]:
+        """
+        Perform one blocking authorized GET request.
+        
+        Rate-limit, server, and connection errors are retried after an
+        exponential backoff, up to safety.max_retries times; a rejected
+        token is refreshed and the request sent again.
+        
+        Args:
+            url: Full request URL including query string
+        
+        Returns:
+            Decoded JSON response
+        
+        Raises:
+            GmailAPIError: If the request fails
+        """
+        creds = self.client.credentials
+        max_retries = self.client.config.safety.max_retries
+        
+        for attempt in range(max_retries + 1):
+            # Long runs outlive the access token, so check it every time
+            token = creds.token
+            if not creds.valid:
+                token = self._refresh_token(token)
+            
+            request = urllib.request.Request(url, headers={'Authorization': f"Bearer {token}"})
+            try:
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    return json.load(response)
+            except urllib.error.HTTPError as e:
+                error = e
+                if e.code == 401:
+                    self._refresh_token(token)
+                    continue
+                if not _is_retryable(e):
+                    break
+            except (OSError, http.client.HTTPException) as e:
+                # Covers URLError from connecting as well as connections
+                # dropped or timed out while reading the response
+                error = e
+            
+            if attempt < max_retries:
+                time.sleep(backoff_delay(attempt))
+        
+        raise GmailAPIError(f"Request failed for {url}: {error}")
+    
+    async def _get_json(self, semaphore: asyncio.Semaphore, path: str,
+                        params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        GET a Gmail API resource without blocking the event loop.
+        
+        Args:
+            semaphore: Limits the number of requests in flight
+            path: Resource path below the user endpoint, e.g. "messages"
+            params: Query parameters; None values are left out
+        
+        Returns:
+            Decoded JSON response
+        """
+        query = urllib.parse.urlencode(
+            {key: value for key, value in params.items() if value is not None}
+        )
+        url = f"{_API_ROOT}/{path}?{query}"
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._fetch_json, url)
+    
+    async def get_messages_batch(self, message_ids: List[str], format: str = 'full') -> List[Dict[str, Any]]:
+        """
+        Get multiple messages with overlapping requests.
+        
+        Args:
+            message_ids: List of Gmail message IDs
+            format: Message format for all messages
+        
+        Returns:
+            List of message dictionaries, in message_ids order
+        
+        Raises:
+            GmailAPIError: If any message retrieval fails
+        """
+        if not message_ids:
+            return []
+        
+        semaphore = asyncio.Semaphore(self.concurrency)
+        messages = await asyncio.gather(*(
+            self._get_json(semaphore, f"messages/{msg_id}", {'format': format})
+            for msg_id in message_ids
+        ))
+        
+        self.logger.info(f"Retrieved {len(messages)} messages in total")
+        return messages
+    
+    async def search_messages(self, query: str, max_results: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Search for messages using Gmail search query syntax.
+        
+        Pages are requested one after another, since each needs the
+        previous page's token.
+        
+        Args:
+            query: Gmail search query (e.g., "older_than:1y")
+            max_results: Maximum number of messages to return
+        
+        Returns:
+            List of message dictionaries with id and threadId
+        """
+        messages = []
+        async for page in self._iter_pages(query, max_results):
+            messages.extend(page)
+        
+        self.logger.info(f"Found {len(messages)} messages for query: {query}")
+        return messages
+    
+    async def search_messages_with_details(self, query: str, format: str = 'metadata',
+                                           max_results: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Search for messages and fetch each one, overlapping the two.
+        
+        While a page's messages are being fetched, the next page of search
+        results is already being requested.
+        
+        Args:
+            query: Gmail search query (e.g., "older_than:1y")
+            format: Message format for the fetched messages
+            max_results: Maximum number of messages to return
+        
+        Returns:
+            List of message dictionaries, in search order
+        """
+        messages = []
+        async for page in self._iter_pages(query, max_results):
+            messages.extend(await self.get_messages_batch([m['id'] for m in page], format))
+        
+        return messages
+    
+    async def _iter_pages(self, query: str, max_results: Optional[int]):
+        """
+        Yield pages of search results, prefetching the following page.
+        
+        Args:
+            query: Gmail search query
+            max_results: Maximum number of messages to yield in total
+        
+        Yields:
+            Lists of message dictionaries with id and threadId
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        def request_page(page_token):
+            # Ask for no more messages than are still needed
+            params = {
+                'q': query,
+                'pageToken': page_token,
+                'maxResults': min(500, remaining) if remaining else 500,
+            }
+            return asyncio.ensure_future(self._get_json(semaphore, 'messages', params))
+        
+        remaining = max_results or None
+        next_page = request_page(None)
+        try:
+            while next_page is not None:
+                response = await next_page
+                page = response.get('messages', [])
+                if remaining is not None:
+                    page = page[:remaining]
+                    remaining -= len(page)
+                
+                # Start on the next page before handing this one to the caller
+                page_token = response.get('nextPageToken')
+                next_page = request_page(page_token) if page_token and remaining != 0 else None
+                
+                if page:
+                    yield page
+        finally:
+            # Don't leave a prefetch running if the caller stops early
+            if next_page is not None:
+                next_page.cancel()
+
+
+if __name__ == "__main__":
+    # Example usage and testing
+    from config import Config
+    
+    print("Async Gmail API Client - Testing")
+    print("=" * 30)
+    
+    async def main():
+        client = AsyncGmailClient(GmailClient(Config()))
+        try:
+            messages = await client.search_messages_with_details("newer_than:7d", max_results=5)
+            print(f"Fetched {len(messages)} recent messages")
+        finally:
+            client.close()
+    
+    try:
+        asyncio.run(main())
+    except GmailAPIError as e:
+        print(f"Gmail API Error: {e}")
+    except Exception as e:
+        print(f"Unexpected error: {e}")
@@ -0,0 +1,317 @@
+"""
+Local Message Index for Gmail Storage Manager
+
+This module keeps the message metadata that cleanup decisions need
+(size, date, labels, sender, subject) in a local SQLite database. The
+first sync reads every message once; later syncs apply only the changes
+reported by Gmail's history API, so repeated runs cost API calls in
+proportion to what changed rather than to the size of the mailbox.
+"""
+
+import sqlite3
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional, Iterable
+
+from googleapiclient.errors import HttpError
+
+from gmail_client import GmailClient, GmailAPIError, MessageMeta, METADATA_FIELDS
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    thread_id TEXT,
+    size INTEGER,
+    date INTEGER,
+    labels TEXT,
+    from_addr TEXT,
+    subject TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_size ON messages (size);
+CREATE INDEX IF NOT EXISTS messages_date ON messages (date);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Messages with these labels are left out of the index, as messages.list
+# leaves them out of the first scan
+_EXCLUDED_LABELS = frozenset(('TRASH', 'SPAM'))
+
+# History record types that change what the index holds
+_HISTORY_TYPES = ['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved']
+
+# Index file name under storage.base_path when storage.index_file is unset
+_DEFAULT_INDEX_NAME = 'message_index.db'
+
+# Messages written to the database per executemany() call
+_WRITE_CHUNK_SIZE = 1000
+
+
+def _timestamp(date: Optional[datetime]) -> Optional[int]:
+    """Convert a message date to Unix seconds, reading naive dates as UTC"""
+    if date is None:
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return int(date.timestamp())
+
+
+def _row(meta: MessageMeta) -> tuple:
+    """Database row for a message's metadata"""
+    return (
+        meta.id,
+        meta.thread_id,
+        meta.size_estimate,
+        _timestamp(meta.date),
+        ','.join(meta.label_ids),
+        meta.sender,
+        meta.subject,
+    )
+
+
+class MessageIndex:
+    """
+    SQLite index of message metadata, kept in step with Gmail.
+    
+    Call sync() at the start of a run, then select messages with
+    select_ids() instead of searching and fetching through the API.
+    Messages in Trash or Spam are not indexed.
+    """
+    
+    def __init__(self, client: GmailClient, index_file: Optional[str] = None):
+        """
+        Open the index, creating it if needed.
+        
+        Args:
+            client: Authenticated Gmail client used for syncing
+            index_file: SQLite database path; defaults to
+                config.storage.index_file, or message_index.db in
+                config.storage.base_path
+        """
+        self.client = client
+        self.logger = logging.getLogger(__name__)
+        
+        storage = client.config.storage
+        path = Path(index_file or storage.index_file or Path(storage.base_path) / _DEFAULT_INDEX_NAME)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+    
+    def close(self) -> None:
+        """Close the database connection"""
+        self.db.close()
+    
+    def sync(self) -> int:
+        """
+        Bring the index up to date with the mailbox.
+        
+        Falls back to a full rebuild when the index is new or Gmail no
+        longer holds history back to the last sync.
+        
+        Returns:
+            Number of messages added, changed, or removed
+        
+        Raises:
+            GmailAPIError: If the mailbox can't be read
+        """
+        history_id = self._get_state('history_id')
+        if history_id is not None:
+            try:
+                return self._sync_history(history_id)
+            except HttpError as e:
+                if e.resp.status != 404:
+                    raise GmailAPIError(f"History sync failed: {e}")
+                self.logger.info("History expired, rebuilding message index")
+        
+        return self._rebuild()
+    
+    def select_ids(self, min_size: Optional[int] = None,
+                   before: Optional[datetime] = None) -> List[str]:
+        """
+        Select indexed messages by size and date.
+        
+        Args:
+            min_size: Only messages of at least this many bytes
+            before: Only messages dated before this time
+        
+        Returns:
+            Matching message IDs, oldest first
+        """
+        # Rows written before Trash and Spam were excluded are skipped too
+        clauses = []
+        params = []
+        for label in sorted(_EXCLUDED_LABELS):
+            clauses.append("',' || labels || ',' NOT LIKE ?")
+            params.append(f"%,{label},%")
+        if min_size is not None:
+            clauses.append('size >= ?')
+            params.append(min_size)
+        if before is not None:
+            clauses.append('date < ?')
+            params.append(_timestamp(before))
+        
+        where = ' AND '.join(clauses)
+        rows = self.db.execute(f"SELECT id FROM messages WHERE {where} ORDER BY date", params)
+        return [message_id for (message_id,) in rows]
+    
+    def _rebuild(self) -> int:
+        """
+        Replace the index with the current contents of the mailbox.
+        
+        Returns:
+            Number of messages indexed
+        """
+        # The history ID is taken first, bypassing the client's profile
+        # cache, so changes made during the scan are applied again by the
+        # next sync
+        try:
+            history_id = self.client.service.users().getProfile(userId='me').execute(
+                num_retries=self.client.config.safety.max_retries
+            )['historyId']
+        except HttpError as e:
+            raise GmailAPIError(f"Failed to get profile: {e}")
+        count = 0
+        
+        with self.db:
+            self.db.execute('DELETE FROM messages')
+            rows = []
+            for message in self.client.iter_with_details('', format='metadata', fields=METADATA_FIELDS):
+                meta = self.client.extract_message_meta(message, format='metadata')
+                if not _EXCLUDED_LABELS.isdisjoint(meta.label_ids):
+                    continue
+                rows.append(_row(meta))
+                if len(rows) >= _WRITE_CHUNK_SIZE:
+                    self._write_rows(rows)
+                    count += len(rows)
+                    rows = []
+            self._write_rows(rows)
+            count += len(rows)
+            self._set_state('history_id', history_id)
+        
+        self.logger.info(f"Indexed {count} messages")
+        return count
+    
+    def _sync_history(self, history_id: str) -> int:
+        """
+        Apply the changes made to the mailbox since history_id.
+        
+        Args:
+            history_id: History ID recorded by the previous sync
+        
+        Returns:
+            Number of messages added, changed, or removed
+        
+        Raises:
+            HttpError: If history can't be listed; status 404 means it
+                no longer reaches back to history_id
+        """
+        added = set()
+        deleted = set()
+        labels = {}
+        page_token = None
+        
+        while True:
+            response = self.client.service.users().history().list(
+                userId='me',
+                startHistoryId=history_id,
+                historyTypes=_HISTORY_TYPES,
+                pageToken=page_token
+            ).execute(num_retries=self.client.config.safety.max_retries)
+            
+            # Later records overwrite earlier ones, so each message ends
+            # up with its latest labels
+            for record in response.get('history', ()):
+                for change in record.get('messagesAdded', ()):
+                    added.add(change['message']['id'])
+                for change in record.get('messagesDeleted', ()):
+                    deleted.add(change['message']['id'])
+                for kind in ('labelsAdded', 'labelsRemoved'):
+                    for change in record.get(kind, ()):
+                        message = change['message']
+                        labels[message['id']] = message.get('labelIds', [])
+            
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+        
+        added -= deleted
+        removed = set(deleted)
+        
+        # Label changes come with the history, except that messages moved
+        # into Trash or Spam leave the index and ones moved out of them are
+        # fetched like new messages
+        label_updates = []
+        for message_id, label_ids in labels.items():
+            if message_id in removed or message_id in added:
+                continue
+            if not _EXCLUDED_LABELS.isdisjoint(label_ids):
+                removed.add(message_id)
+            elif self._is_indexed(message_id):
+                label_updates.append((','.join(label_ids), message_id))
+            else:
+                added.add(message_id)
+        
+        rows = []
+        for message in self.client.get_messages_batch(added, format='metadata', fields=METADATA_FIELDS):
+            meta = self.client.extract_message_meta(message, format='metadata')
+            if _EXCLUDED_LABELS.isdisjoint(meta.label_ids):
+                rows.append(_row(meta))
+            else:
+                removed.add(meta.id)
+        
+        with self.db:
+            self.db.executemany('UPDATE messages SET labels = ? WHERE id = ?', label_updates)
+            self._write_rows(rows)
+            self._delete_ids(removed)
+            self._set_state('history_id', response.get('historyId', history_id))
+        
+        changed = len(added | removed | labels.keys())
+        self.logger.info(f"Synced {changed} changed messages")
+        return changed
+    
+    def _write_rows(self, rows: List[tuple]) -> None:
+        """Insert or replace message rows"""
+        self.db.executemany('INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    
+    def _is_indexed(self, message_id: str) -> bool:
+        """Check whether a message is in the index"""
+        return self.db.execute('SELECT 1 FROM messages WHERE id = ?', (message_id,)).fetchone() is not None
+    
+    def _delete_ids(self, message_ids: Iterable[str]) -> None:
+        """Remove messages from the index"""
+        self.db.executemany('DELETE FROM messages WHERE id = ?', [(message_id,) for message_id in message_ids])
+    
+    def _get_state(self, key: str) -> Optional[str]:
+        """Read a sync state value"""
+        row = self.db.execute('SELECT value FROM sync_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _set_state(self, key: str, value: str) -> None:
+        """Write a sync state value"""
+        self.db.execute('INSERT OR REPLACE INTO sync_state VALUES (?, ?)', (key, str(value)))
+
+
+if __name__ == "__main__":
+    # Example usage and testing
+    from datetime import timedelta
+    from config import Config
+    
+    print("Message Index - Testing")
+    print("=" * 30)
+    
+    try:
+        index = MessageIndex(GmailClient(Config()))
+        print(f"Synced {index.sync()} messages")
+        
+        cutoff = datetime.now(timezone.utc) - timedelta(days=365)
+        large_old = index.select_ids(min_size=5 * 1024 * 1024, before=cutoff)
+        print(f"Messages over 5 MB and older than a year: {len(large_old)}")
+        index.close()
+    except GmailAPIError as e:
+        print(f"Gmail API Error: {e}")
+    except Exception as e:
+        print(f"Unexpected error: {e}")